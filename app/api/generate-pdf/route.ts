@@ -1,30 +1,61 @@
 import { NextRequest, NextResponse } from 'next/server'
 
+// Response headers from Flask that are passed through to the browser
+const FORWARDED_HEADERS = [
+  'Content-Length',
+  'Content-Disposition',
+  'Content-Location',
+  'ETag',
+  'X-Cache',
+  'Server-Timing',
+]
+
 export async function POST(request: NextRequest) {
   try {
     const data = await request.json()
     
     // Forward the request to the Python Flask server
-    const response = await fetch('http://localhost:8000/api/generate-pdf', {
+    const headers: Record<string, string> = {
+      'Content-Type': 'application/json',
+    }
+    const ifNoneMatch = request.headers.get('If-None-Match')
+    if (ifNoneMatch) {
+      headers['If-None-Match'] = ifNoneMatch
+    }
+    
+    // Pass ?timing=1 through so Flask adds a Server-Timing header
+    const response = await fetch(`http://localhost:8000/api/generate-pdf${request.nextUrl.search}`, {
       method: 'POST',
-      headers: {
-        'Content-Type': 'application/json',
-      },
+      headers,
       body: JSON.stringify(data),
     })
     
+    if (response.status === 304) {
+      return new NextResponse(null, {
+        status: 304,
+        headers: { ETag: response.headers.get('ETag') ?? '' },
+      })
+    }
+    
     if (!response.ok) {
       throw new Error(`Flask server error: ${response.status}`)
     }
     
-    const pdfBuffer = await response.arrayBuffer()
+    const responseHeaders: Record<string, string> = {
+      'Content-Type': 'application/pdf',
+      'Content-Disposition': 'attachment; filename="agenda.pdf"',
+    }
+    for (const name of FORWARDED_HEADERS) {
+      const value = response.headers.get(name)
+      if (value) {
+        responseHeaders[name] = value
+      }
+    }
     
-    return new NextResponse(pdfBuffer, {
+    // Pipe the PDF through as it arrives instead of buffering the whole file
+    return new NextResponse(response.body, {
       status: 200,
-      headers: {
-        'Content-Type': 'application/pdf',
-        'Content-Disposition': 'attachment; filename="agenda.pdf"',
-      },
+      headers: responseHeaders,
     })
   } catch (error) {
     console.error('PDF generation error:', error)
@@ -33,4 +64,4 @@ export async function POST(request: NextRequest) {
       { status: 500 }
     )
   }
-} 
\ No newline at end of file
+}
@@ -0,0 +1,53 @@
+import { NextRequest, NextResponse } from 'next/server'
+
+// Response headers from Flask that are passed through to the browser
+const FORWARDED_HEADERS = [
+  'Content-Type',
+  'Content-Length',
+  'Content-Range',
+  'Content-Disposition',
+  'Accept-Ranges',
+  'ETag',
+  'Last-Modified',
+]
+
+export async function GET(
+  request: NextRequest,
+  { params }: { params: { key: string } }
+) {
+  try {
+    // Forward range and revalidation headers so the PDF viewer can fetch pages on demand
+    const headers: Record<string, string> = {}
+    for (const name of ['Range', 'If-Range', 'If-None-Match']) {
+      const value = request.headers.get(name)
+      if (value) {
+        headers[name] = value
+      }
+    }
+    
+    const response = await fetch(
+      `http://localhost:8000/api/pdf/${encodeURIComponent(params.key)}`,
+      { headers }
+    )
+    
+    const responseHeaders: Record<string, string> = {}
+    for (const name of FORWARDED_HEADERS) {
+      const value = response.headers.get(name)
+      if (value) {
+        responseHeaders[name] = value
+      }
+    }
+    
+    // Stream the (partial) body straight through
+    return new NextResponse(response.body, {
+      status: response.status,
+      headers: responseHeaders,
+    })
+  } catch (error) {
+    console.error('PDF fetch error:', error)
+    return NextResponse.json(
+      { error: 'Failed to fetch PDF' },
+      { status: 500 }
+    )
+  }
+}
@@ -0,0 +1,61 @@
+"""
+Packaging helpers for batch generation: streamed ZIP archives and merged PDFs
+"""
+
+import io
+import zipfile
+
+
+class _ZipSink:
+    """Write-only file object that collects ZIP output until it is drained"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def stream_zip(entries):
+    """Yield a ZIP archive chunk by chunk as (name, bytes) entries arrive"""
+    sink = _ZipSink()
+    # The sink is not seekable, so zipfile writes data descriptors after each entry
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, data in entries:
+            archive.writestr(name, data)
+            yield sink.drain()
+    yield sink.drain()
+
+
+def merge_pdfs(parts):
+    """Concatenate (key, title, PDF bytes) parts into one PDF with a bookmark per part
+
+    Returns the merged PDF and a list of (key, error) for parts that could not be read.
+    """
+    try:
+        from pypdf import PdfWriter
+    except ImportError:
+        raise ImportError("Merged PDF output requires the pypdf package")
+
+    writer = PdfWriter()
+    failures = []
+    for key, title, data in parts:
+        try:
+            writer.append(io.BytesIO(data), outline_item=title)
+        except Exception as e:
+            failures.append((key, f"Could not merge PDF: {str(e)}"))
+
+    output = io.BytesIO()
+    writer.write(output)
+    writer.close()
+    output.seek(0)
+    return output, failures
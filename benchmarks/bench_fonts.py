@@ -0,0 +1,89 @@
+"""
+Compare the python-docx font walk with the XPath bulk font application
+
+Renders a long agenda, appends an attendance table with merged cells, and times
+both on copies of the same document after checking they produce identical XML.
+
+Usage: python benchmarks/bench_fonts.py [--items 1000] [--rows 200] [--repeat 5]
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+# demo_server resolves templates relative to the working directory
+os.chdir(ROOT)
+
+from docx import Document
+from docx.shared import Pt
+from lxml import etree
+
+import demo_server
+from bench_pipeline import agenda_sections
+
+FONT_SETTINGS = {'document_font': 'Arial', 'font_size': 11, 'heading_font': 'Georgia', 'heading_size': 20}
+
+
+def build_document(items, rows):
+    """Rendered agenda with items lines plus an attendance table of rows x 4 cells, as DOCX bytes"""
+    doc = Document(demo_server.generate_word_document({'agenda_sections': agenda_sections(items)}))
+
+    table = doc.add_table(rows=rows, cols=4)
+    for index, row in enumerate(table.rows):
+        for column, cell in enumerate(row.cells):
+            run = cell.paragraphs[0].add_run(f'Attendee {index}.{column}')
+            if index % 10 == 0:
+                run.font.size = Pt(18)
+    # Horizontal and vertical merges, which python-docx resolves on every row.cells call
+    for index in range(0, rows - 1, 5):
+        table.cell(index, 0).merge(table.cell(index + 1, 0))
+        table.cell(index, 2).merge(table.cell(index, 3))
+
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def load(docx_bytes):
+    # Reparse rather than deepcopy: a copied Document's cached body proxy points at a detached tree
+    return Document(io.BytesIO(docx_bytes))
+
+
+def time_it(func, docx_bytes, fonts, repeat):
+    total = 0.0
+    for _ in range(repeat):
+        target = load(docx_bytes)
+        start = time.perf_counter()
+        func(target, fonts)
+        total += time.perf_counter() - start
+    return total / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--items', type=int, default=1000)
+    parser.add_argument('--rows', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    docx_bytes = build_document(args.items, args.rows)
+    fonts = demo_server.resolve_fonts(FONT_SETTINGS)
+
+    walked, bulk = load(docx_bytes), load(docx_bytes)
+    demo_server.apply_fonts_by_walk(walked, fonts)
+    demo_server.apply_fonts(bulk, fonts)
+    assert etree.tostring(walked.element) == etree.tostring(bulk.element), "font application differs"
+
+    runs = len(walked.element.body.xpath('.//w:r'))
+    print(f"{args.items} agenda items, {args.rows}-row table: {runs} runs, {len(docx_bytes) // 1024} KB, {args.repeat} runs each")
+    print(f"  python-docx walk  {time_it(demo_server.apply_fonts_by_walk, docx_bytes, fonts, args.repeat):8.2f} ms")
+    print(f"  XPath bulk        {time_it(demo_server.apply_fonts, docx_bytes, fonts, args.repeat):8.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
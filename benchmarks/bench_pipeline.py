@@ -0,0 +1,370 @@
+"""
+Benchmark every template type that /api/generate-pdf can render
+
+Runs each branch of render_pdf against synthetic payloads of increasing size and
+reports latency percentiles, throughput under concurrent clients, peak RSS of
+the process and its converter workers during each case, and time per pipeline
+stage. Results are written as JSON; pass --baseline with an earlier results
+file to flag regressions.
+
+Usage: python benchmarks/bench_pipeline.py [--sizes 10,100,1000] [--iterations 20]
+                                           [--concurrency 4] [--output results.json]
+                                           [--baseline previous.json]
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# demo_server resolves templates and assets relative to the working directory
+os.chdir(ROOT)
+# Keep benchmark renders out of the server's PDF cache
+os.environ.setdefault('PDF_CACHE_DIR', tempfile.mkdtemp(prefix='bench-pdf-cache-'))
+
+import demo_server
+from docxtpl import DocxTemplate
+
+TEMPLATE_TYPES = ('sausalito-agenda', 'dublin-agenda', 'dublin-word', 'dublin-tiptap', 'sausalito-word')
+SOFFICE_TEMPLATE_TYPES = ('sausalito-agenda', 'dublin-word')
+
+# Pipeline functions timed as stages; each name is looked up on demo_server at call time
+STAGE_FUNCTIONS = {
+    'context': ('build_agenda_context', 'build_agenda_lines'),
+    'html': ('generate_dublin_html_document', 'generate_dublin_tiptap_document', 'generate_sausalito_word_document'),
+    'postprocess': ('apply_document_settings', 'insert_agenda_lines'),
+    'conversion': ('convert_to_pdf', 'convert_html_to_pdf'),
+}
+STAGE_METHODS = {
+    'docxtpl_render': (DocxTemplate, 'render'),
+    'serialize': (DocxTemplate, 'save'),
+}
+
+
+class StageTimer:
+    """Accumulates time spent in each pipeline stage for the request on the current thread"""
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def begin(self):
+        self._local.stages = {}
+
+    def end(self):
+        stages, self._local.stages = getattr(self._local, 'stages', {}), {}
+        return stages
+
+    def wrap(self, stage, func):
+        timer = self
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                stages = getattr(timer._local, 'stages', None)
+                if stages is not None:
+                    stages[stage] = stages.get(stage, 0.0) + time.perf_counter() - start
+        timed.__wrapped__ = func
+        return timed
+
+    def install(self):
+        for stage, names in STAGE_FUNCTIONS.items():
+            for name in names:
+                setattr(demo_server, name, self.wrap(stage, getattr(demo_server, name)))
+        for stage, (owner, name) in STAGE_METHODS.items():
+            setattr(owner, name, self.wrap(stage, getattr(owner, name)))
+
+
+def agenda_sections(item_count):
+    """Sections of 10 items with attachments, with a section break every fifth section"""
+    sections = []
+    for section_index in range((item_count + 9) // 10):
+        if section_index % 5 == 0:
+            sections.append({'type': 'break', 'title': f'SESSION {section_index // 5 + 1}'})
+        items = [{
+            'number': str(item_index + 1),
+            'prefix': f'{section_index + 1}.',
+            'title': f'Consideration of agenda item {item_index + 1} & related staff recommendations',
+            'attachments': [f'Staff Report {item_index + 1}.pdf', 'Resolution.pdf'] if item_index % 2 else [],
+        } for item_index in range(min(10, item_count - section_index * 10))]
+        sections.append({
+            'type': 'section',
+            'number': str(section_index + 1),
+            'title': f'Agenda Section {section_index + 1}',
+            'items': items,
+        })
+    return sections
+
+
+def tiptap_document(item_count, depth=1):
+    """TipTap document with item_count paragraphs, each nested depth blocks deep"""
+    def paragraph(index):
+        node = {'type': 'dublinParagraph', 'attrs': {'align': 'left', 'spacing': 'normal', 'variant': 'body'},
+                'content': [{'type': 'text', 'text': f'Paragraph {index} of the Dublin agenda'}, {'type': 'hardBreak'}]}
+        for _ in range(depth - 1):
+            node = {'type': 'locationBlock', 'content': [node]}
+        return node
+
+    content = [
+        {'type': 'coverHeader', 'content': [
+            {'type': 'dublinLogo'},
+            {'type': 'dublinTitle', 'attrs': {'level': 'main'}, 'content': [{'type': 'text', 'text': 'DUBLIN CITY COUNCIL'}]},
+        ]},
+        {'type': 'noticeBox', 'attrs': {'title': 'Additional Meeting Procedures'},
+         'content': [paragraph(i) for i in range(10)]},
+    ]
+    content.extend(paragraph(i) for i in range(item_count))
+    return {'type': 'doc', 'content': content}
+
+
+def html_content(item_count):
+    parts = ['<h1 class="section-heading">Sausalito City Council</h1>']
+    for index in range(item_count):
+        parts.append(f'<h2>Item {index + 1}</h2><p>{"Staff recommends approval of the proposed item. " * 8}</p>')
+        if index % 25 == 0:
+            parts.append('<div class="staff-report"><p>Staff report attached.</p></div>')
+    return ''.join(parts)
+
+
+def build_cases(sizes, template_types):
+    """Return (name, template type, payload) for every benchmark case"""
+    cases = []
+    for template_type in template_types:
+        for size in sizes:
+            payload = {
+                'template': template_type,
+                'city_name': 'Sausalito',
+                'meeting_date': 'January 1, 2025',
+                'agenda_sections': agenda_sections(size),
+                'font_settings': {'document_font': 'Times New Roman', 'font_size': 12},
+            }
+            if template_type == 'dublin-tiptap':
+                payload = {'template': template_type, 'tiptap_content': tiptap_document(size)}
+            elif template_type == 'sausalito-word':
+                payload = {'template': template_type, 'html_content': html_content(size)}
+            cases.append((f'{template_type}/{size}', template_type, payload))
+
+        if template_type == 'dublin-tiptap':
+            deep = {'template': template_type, 'tiptap_content': tiptap_document(max(sizes), depth=50)}
+            cases.append((f'{template_type}/deep-{max(sizes)}x50', template_type, deep))
+    return cases
+
+
+def percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, max(0, round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def process_rss_bytes():
+    """Resident bytes of this process and of its live descendants (converter and WeasyPrint workers)"""
+    page_size = os.sysconf('SC_PAGE_SIZE')
+    children = {}
+    for pid in os.listdir('/proc'):
+        if not pid.isdigit():
+            continue
+        try:
+            with open(f'/proc/{pid}/stat') as f:
+                # The command name may contain spaces, so fields are counted after its closing paren
+                ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(pid))
+
+    def rss(pid):
+        try:
+            with open(f'/proc/{pid}/statm') as f:
+                return int(f.read().split()[1]) * page_size
+        except (OSError, IndexError, ValueError):
+            return 0
+
+    own = rss(os.getpid())
+    descendants = 0
+    pending = list(children.get(os.getpid(), []))
+    while pending:
+        pid = pending.pop()
+        descendants += rss(pid)
+        pending.extend(children.get(pid, []))
+    return own, descendants
+
+
+class RSSSampler:
+    """Samples resident memory in the background and keeps the peak seen during one case
+
+    Reads /proc, so it reports nothing on platforms without it.
+    """
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.available = os.path.isdir('/proc')
+        self._peak = (0, 0)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        own, descendants = process_rss_bytes()
+        self._peak = (max(self._peak[0], own), max(self._peak[1], descendants))
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def __enter__(self):
+        if self.available:
+            self._sample()
+            self._thread = threading.Thread(target=self._run, name='rss-sampler', daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._sample()
+
+    def peak_mb(self):
+        if not self.available:
+            return None
+        scale = 1024 * 1024
+        return {'self': self._peak[0] / scale, 'children': self._peak[1] / scale}
+
+
+def run_case(timer, payload, iterations, concurrency):
+    """Time sequential renders for latency and stages, then concurrent renders for throughput"""
+    # Warm up templates, converter workers and caches
+    demo_server.render_pdf(payload)
+
+    with RSSSampler() as sampler:
+        result = time_case(timer, payload, iterations, concurrency)
+    # Peak resident memory during this case alone, including the live pool worker processes
+    result['peak_rss_mb'] = sampler.peak_mb()
+    return result
+
+
+def time_case(timer, payload, iterations, concurrency):
+
+    latencies = []
+    stage_totals = {}
+    for _ in range(iterations):
+        timer.begin()
+        start = time.perf_counter()
+        demo_server.render_pdf(payload)
+        latencies.append(time.perf_counter() - start)
+        for stage, seconds in timer.end().items():
+            stage_totals[stage] = stage_totals.get(stage, 0.0) + seconds
+
+    def one_request(_):
+        timer.begin()
+        demo_server.render_pdf(payload)
+        timer.end()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(one_request, range(iterations)))
+    concurrent_seconds = time.perf_counter() - start
+
+    latencies.sort()
+    to_ms = 1000
+    return {
+        'iterations': iterations,
+        'latency_ms': {
+            'p50': percentile(latencies, 0.50) * to_ms,
+            'p95': percentile(latencies, 0.95) * to_ms,
+            'p99': percentile(latencies, 0.99) * to_ms,
+            'mean': statistics.mean(latencies) * to_ms,
+            'min': latencies[0] * to_ms,
+            'max': latencies[-1] * to_ms,
+        },
+        'stages_ms': {stage: seconds / iterations * to_ms for stage, seconds in sorted(stage_totals.items())},
+        'throughput_rps': {
+            'sequential': iterations / sum(latencies),
+            f'concurrency_{concurrency}': iterations / concurrent_seconds,
+        },
+    }
+
+
+def compare(results, baseline, threshold):
+    """Return a line for every case whose p50 latency grew by more than threshold"""
+    regressions = []
+    for name, result in results['cases'].items():
+        previous = baseline.get('cases', {}).get(name)
+        if not previous or 'latency_ms' not in previous or 'latency_ms' not in result:
+            continue
+        before, after = previous['latency_ms']['p50'], result['latency_ms']['p50']
+        if before and (after - before) / before > threshold:
+            regressions.append(f"{name}: p50 {before:.1f} ms -> {after:.1f} ms")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', default='10,100,1000', help='comma-separated agenda item counts')
+    parser.add_argument('--templates', default=','.join(TEMPLATE_TYPES), help='comma-separated template types')
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--output', default='benchmark-results.json')
+    parser.add_argument('--baseline', help='earlier results file to compare p50 latency against')
+    parser.add_argument('--threshold', type=float, default=0.2, help='allowed p50 slowdown before flagging')
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(',')]
+    template_types = [name for name in args.templates.split(',') if name]
+    has_soffice = shutil.which('soffice') is not None
+
+    timer = StageTimer()
+    timer.install()
+
+    results = {
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'concurrency': args.concurrency,
+        'soffice': has_soffice,
+        'cases': {},
+    }
+
+    for name, template_type, payload in build_cases(sizes, template_types):
+        if template_type in SOFFICE_TEMPLATE_TYPES and not has_soffice:
+            results['cases'][name] = {'skipped': 'soffice not found on PATH'}
+            print(f"{name:32} skipped (soffice not found)")
+            continue
+
+        try:
+            result = run_case(timer, payload, args.iterations, args.concurrency)
+        except Exception as e:
+            results['cases'][name] = {'error': str(e)}
+            print(f"{name:32} failed: {str(e).splitlines()[0]}")
+            continue
+
+        results['cases'][name] = result
+        latency = result['latency_ms']
+        stages = ', '.join(f"{stage} {ms:.1f}" for stage, ms in result['stages_ms'].items())
+        throughput = result['throughput_rps'][f'concurrency_{args.concurrency}']
+        print(f"{name:32} p50 {latency['p50']:8.1f}  p95 {latency['p95']:8.1f}  p99 {latency['p99']:8.1f} ms"
+              f"  {throughput:7.1f} req/s  [{stages}]")
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
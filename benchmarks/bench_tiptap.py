@@ -0,0 +1,108 @@
+"""
+Compare the recursive TipTap converter with the iterative, memoized one
+
+Usage: python benchmarks/bench_tiptap.py [--blocks 2000] [--repeat 20]
+"""
+
+import argparse
+import copy
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tiptap_html import TiptapConverter, convert_tiptap_to_html_recursive
+
+
+def text(value):
+    return {'type': 'text', 'text': value}
+
+
+def paragraph(value, **attrs):
+    attrs = {'align': 'left', 'spacing': 'normal', 'variant': 'body', **attrs}
+    return {'type': 'dublinParagraph', 'attrs': attrs, 'content': [text(value), {'type': 'hardBreak'}, text('continued')]}
+
+
+def build_document(blocks):
+    """Synthetic Dublin agenda: cover, long council list and notice boxes with many paragraphs"""
+    content = [
+        {'type': 'coverHeader', 'content': [
+            {'type': 'dublinLogo'},
+            {'type': 'dublinTitle', 'attrs': {'level': 'main'}, 'content': [text('DUBLIN CITY COUNCIL')]},
+        ]},
+        {'type': 'councilList', 'content': [paragraph(f'Councilmember {i}') for i in range(blocks // 10)]},
+    ]
+    for i in range(blocks):
+        if i % 50 == 0:
+            content.append({'type': 'sectionBreak', 'attrs': {'text': f'SECTION {i // 50}'}})
+        if i % 20 == 0:
+            content.append({'type': 'noticeBox', 'attrs': {'title': 'Additional Meeting Procedures'},
+                            'content': [paragraph(f'Procedure {j}') for j in range(20)]})
+        content.append(paragraph(f'Item {i}', align='center' if i % 3 else 'left'))
+    return {'type': 'doc', 'content': content}
+
+
+def build_deep_document(depth):
+    node = text('deepest')
+    for _ in range(depth):
+        node = {'type': 'locationBlock', 'content': [node]}
+    return {'type': 'doc', 'content': [node]}
+
+
+def time_it(func, doc, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func(doc)
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--blocks', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    doc = build_document(args.blocks)
+    assert TiptapConverter().convert(doc) == convert_tiptap_to_html_recursive(doc), "converters disagree"
+
+    # Cold: a fresh converter each call, so nothing is reused
+    uncached = time_it(TiptapConverter(memoized_types=()).convert, doc, args.repeat)
+    cold = time_it(lambda d: TiptapConverter().convert(d), doc, args.repeat)
+
+    # Warm: the same document re-rendered, as on repeated preview requests
+    warm_converter = TiptapConverter()
+    warm_converter.convert(doc)
+    warm = time_it(warm_converter.convert, doc, args.repeat)
+
+    # Edit: one paragraph changed between renders
+    edited = copy.deepcopy(doc)
+    edit_converter = TiptapConverter()
+    edit_converter.convert(doc)
+
+    def convert_edited(d):
+        d['content'][-1]['content'][0]['text'] += '.'
+        return edit_converter.convert(d)
+    edit = time_it(convert_edited, edited, args.repeat)
+
+    recursive = time_it(convert_tiptap_to_html_recursive, doc, args.repeat)
+
+    print(f"{len(doc['content'])} top-level blocks, {args.repeat} runs each")
+    print(f"  recursive           {recursive:8.2f} ms")
+    print(f"  iterative (no memo) {uncached:8.2f} ms")
+    print(f"  iterative (cold)    {cold:8.2f} ms")
+    print(f"  iterative (warm)    {warm:8.2f} ms")
+    print(f"  iterative (1 edit)  {edit:8.2f} ms")
+
+    depth = sys.getrecursionlimit() * 2
+    deep = build_deep_document(depth)
+    try:
+        recursive_ok = convert_tiptap_to_html_recursive(deep).endswith('</div>')
+    except RecursionError:
+        recursive_ok = False
+    iterative_ok = TiptapConverter().convert(deep).endswith('</div>')
+    print(f"nesting depth {depth}: recursive {'ok' if recursive_ok else 'failed'}, iterative {'ok' if iterative_ok else 'failed'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,480 @@
+"""
+Pool of long-lived headless LibreOffice instances for DOCX -> PDF conversion
+"""
+
+import atexit
+import os
+import queue
+import shutil
+import signal
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+
+SOFFICE_BINARY = os.environ.get('SOFFICE_BINARY', 'soffice')
+
+
+class ConversionTimeout(Exception):
+    """Raised when a single conversion job exceeds its time budget"""
+
+
+def _uno_available():
+    """Check whether the python UNO bridge that ships with LibreOffice is importable"""
+    try:
+        import uno  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def _kill_process_group(process):
+    """Kill a process started in its own session together with everything it spawned"""
+    # soffice is a launcher script that execs or forks soffice.bin, so killing only
+    # the launcher's pid can leave the real office process running
+    try:
+        if hasattr(os, 'killpg'):
+            os.killpg(process.pid, signal.SIGKILL)
+        else:
+            process.kill()
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def _property(name, value):
+    """Build a UNO PropertyValue"""
+    from com.sun.star.beans import PropertyValue
+    prop = PropertyValue()
+    prop.Name = name
+    prop.Value = value
+    return prop
+
+
+class SofficeWorker:
+    """One headless LibreOffice instance with its own user profile directory"""
+
+    def __init__(self, worker_id, pipe_name, use_uno, startup_timeout=30):
+        self.worker_id = worker_id
+        self.pipe_name = pipe_name
+        self.use_uno = use_uno
+        self.startup_timeout = startup_timeout
+        self.profile_dir = tempfile.mkdtemp(prefix=f'soffice-profile-{worker_id}-')
+        self.process = None
+        self.desktop = None
+        self.jobs_done = 0
+        self.restarts = 0
+        self.needs_restart = True
+
+    @property
+    def profile_url(self):
+        return 'file://' + self.profile_dir
+
+    def start(self):
+        """Launch the office process and connect to it"""
+        self.jobs_done = 0
+
+        if not self.use_uno:
+            # Without the UNO bridge every job is a one-shot soffice run, but it
+            # still reuses this worker's already-initialised private profile
+            self.needs_restart = False
+            return
+
+        self.process = subprocess.Popen([
+            SOFFICE_BINARY, '--headless', '--invisible', '--nologo', '--nodefault',
+            '--norestore', '--nolockcheck',
+            f'-env:UserInstallation={self.profile_url}',
+            f'--accept=pipe,name={self.pipe_name};urp;StarOffice.ComponentContext'
+        ], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True)
+
+        try:
+            self.desktop = self._connect()
+        except Exception:
+            # An office process that never answered is killed and replaced before the next job
+            self.stop()
+            self.needs_restart = True
+            raise
+        self.needs_restart = False
+
+    def _connect(self):
+        """Wait for the office listener to come up and return its Desktop service"""
+        import uno
+
+        local_context = uno.getComponentContext()
+        resolver = local_context.ServiceManager.createInstanceWithContext(
+            'com.sun.star.bridge.UnoUrlResolver', local_context)
+
+        deadline = time.monotonic() + self.startup_timeout
+        while True:
+            if self.process.poll() is not None:
+                raise Exception(f"soffice worker {self.worker_id} exited during startup")
+            try:
+                context = resolver.resolve(
+                    f'uno:pipe,name={self.pipe_name};urp;StarOffice.ComponentContext')
+                return context.ServiceManager.createInstanceWithContext(
+                    'com.sun.star.frame.Desktop', context)
+            except Exception:
+                if time.monotonic() > deadline:
+                    raise Exception(f"soffice worker {self.worker_id} did not start in {self.startup_timeout}s")
+                time.sleep(0.2)
+
+    def stop(self):
+        """Kill the office process"""
+        self.desktop = None
+        if self.process is not None:
+            try:
+                _kill_process_group(self.process)
+                self.process.wait(timeout=5)
+            except Exception:
+                pass
+            self.process = None
+
+    def restart(self):
+        """Replace a crashed, hung or worn-out office process with a fresh one"""
+        if self.process is not None or self.jobs_done:
+            self.restarts += 1
+        self.stop()
+        self.start()
+
+    def is_alive(self):
+        if not self.use_uno:
+            return True
+        return self.process is not None and self.process.poll() is None
+
+    def convert(self, docx_filename, output_dir, timeout):
+        """Convert one document, returning the PDF path"""
+        pdf_filename, error = self.convert_many([docx_filename], output_dir, timeout)[0]
+        if error:
+            raise Exception(error)
+        return pdf_filename
+
+    def convert_many(self, docx_filenames, output_dir, timeout):
+        """Convert documents into one output directory, returning (pdf path, error) per input"""
+        pdf_filenames = [
+            os.path.join(output_dir, os.path.splitext(os.path.basename(docx_filename))[0] + '.pdf')
+            for docx_filename in docx_filenames
+        ]
+        errors = {}
+
+        if self.use_uno:
+            for docx_filename, pdf_filename in zip(docx_filenames, pdf_filenames):
+                if self.needs_restart:
+                    errors[docx_filename] = "conversion skipped after an earlier document hung the worker"
+                    continue
+                try:
+                    self._convert_uno(docx_filename, pdf_filename, timeout)
+                except Exception as e:
+                    errors[docx_filename] = str(e)
+        else:
+            # soffice takes any number of inputs, so startup is paid once per batch
+            self._convert_subprocess(docx_filenames, output_dir, timeout * len(docx_filenames))
+
+        results = []
+        for docx_filename, pdf_filename in zip(docx_filenames, pdf_filenames):
+            if docx_filename in errors:
+                results.append((None, errors[docx_filename]))
+            elif not os.path.exists(pdf_filename):
+                results.append((None, f"LibreOffice produced no output for {docx_filename}"))
+            else:
+                results.append((pdf_filename, None))
+        return results
+
+    def _convert_uno(self, docx_filename, pdf_filename, timeout):
+        """Load, export and close a document inside the running office instance"""
+        import uno
+
+        outcome = {}
+
+        def run():
+            try:
+                document = self.desktop.loadComponentFromURL(
+                    uno.systemPathToFileUrl(os.path.abspath(docx_filename)), '_blank', 0,
+                    (_property('Hidden', True),))
+                try:
+                    document.storeToURL(
+                        uno.systemPathToFileUrl(os.path.abspath(pdf_filename)),
+                        (_property('FilterName', 'writer_pdf_Export'),))
+                finally:
+                    document.close(True)
+            except Exception as e:
+                outcome['error'] = e
+
+        job = threading.Thread(target=run, daemon=True)
+        job.start()
+        job.join(timeout)
+
+        if job.is_alive():
+            # The office process is wedged; it is killed and replaced before its next job
+            self.needs_restart = True
+            self.stop()
+            raise ConversionTimeout(f"conversion exceeded {timeout}s")
+        if 'error' in outcome:
+            raise outcome['error']
+
+    def _convert_subprocess(self, docx_filenames, output_dir, timeout):
+        """Run a one-shot soffice conversion against this worker's profile"""
+        process = subprocess.Popen([
+            SOFFICE_BINARY, '--headless', '--norestore', '--nolockcheck',
+            f'-env:UserInstallation={self.profile_url}',
+            '--convert-to', 'pdf', '--outdir', output_dir, *docx_filenames
+        ], stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, start_new_session=True)
+        try:
+            _, stderr = process.communicate(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            _kill_process_group(process)
+            process.communicate()
+            raise ConversionTimeout(f"conversion exceeded {timeout}s")
+
+        if process.returncode != 0:
+            raise Exception(f"LibreOffice conversion failed: {stderr}")
+
+    def close(self):
+        """Stop the process and remove the private profile"""
+        self.stop()
+        shutil.rmtree(self.profile_dir, ignore_errors=True)
+
+
+class ConverterPool:
+    """Hands conversion jobs to a fixed set of warm LibreOffice workers"""
+
+    def __init__(self, size=2, max_jobs_per_worker=50, job_timeout=30):
+        self.size = size
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self.job_timeout = job_timeout
+        self.use_uno = _uno_available()
+        self._workers = []
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._busy = 0
+        self._jobs = 0
+        self._failures = 0
+
+    @property
+    def mode(self):
+        """'uno' for persistent office processes, 'subprocess' for one soffice run per job"""
+        return 'uno' if self.use_uno else 'subprocess'
+
+    def start(self):
+        """Create the workers; office processes are launched on first use"""
+        with self._lock:
+            if self._workers:
+                return
+            if not self.use_uno:
+                print("Warning: python UNO bridge not importable; converter pool falls back to "
+                      "one soffice process per job, paying LibreOffice startup on every conversion")
+            for worker_id in range(self.size):
+                # Named pipes are unique per web worker process, unlike a shared range of TCP ports
+                pipe_name = f'walfred-soffice-{os.getpid()}-{worker_id}'
+                worker = SofficeWorker(worker_id, pipe_name, self.use_uno)
+                self._workers.append(worker)
+                self._idle.put(worker)
+
+    def warm(self):
+        """Launch every office process now instead of on the first request"""
+        if shutil.which(SOFFICE_BINARY) is None:
+            # One-shot mode launches nothing here, so a missing binary would only show on the first job
+            raise Exception(f"LibreOffice binary {SOFFICE_BINARY} not found")
+        self.start()
+        for worker in self._workers:
+            if worker.needs_restart:
+                worker.start()
+
+    def _acquire(self):
+        worker = self._idle.get()
+        with self._lock:
+            self._busy += 1
+        return worker
+
+    def _release(self, worker):
+        with self._lock:
+            self._busy -= 1
+        self._idle.put(worker)
+
+    def convert(self, docx_filename, output_dir=None, timeout=None):
+        """Convert a DOCX file to PDF on the next free worker"""
+        output_dir = output_dir or os.path.dirname(docx_filename)
+        pdf_filename, error = self.convert_many([docx_filename], output_dir, timeout)[0]
+        if error:
+            raise Exception(error)
+        return pdf_filename
+
+    def convert_many(self, docx_filenames, output_dir, timeout=None):
+        """Convert several DOCX files on one worker, returning (pdf path, error) per input"""
+        self.start()
+        timeout = timeout or self.job_timeout
+
+        worker = self._acquire()
+        try:
+            if worker.needs_restart or not worker.is_alive():
+                worker.restart()
+
+            results = worker.convert_many(docx_filenames, output_dir, timeout)
+
+            failed = sum(1 for _, error in results if error)
+            with self._lock:
+                self._jobs += len(results) - failed
+                self._failures += failed
+            worker.jobs_done += len(results)
+            if worker.jobs_done >= self.max_jobs_per_worker:
+                # Recycle before the office process accumulates too much state
+                worker.needs_restart = True
+            return results
+
+        except Exception:
+            with self._lock:
+                self._failures += len(docx_filenames)
+            if not worker.is_alive():
+                worker.needs_restart = True
+            raise
+
+        finally:
+            self._release(worker)
+
+    def convert_bytes_batch(self, documents):
+        """Convert in-memory DOCX documents in one run, returning (pdf bytes, error) per document"""
+        # LibreOffice needs real files; the working directory is removed even on failure or timeout
+        with tempfile.TemporaryDirectory(prefix='walfred-convert-') as work_dir:
+            docx_filenames = []
+            for index, docx_bytes in enumerate(documents):
+                docx_filename = os.path.join(work_dir, f'document-{index}.docx')
+                with open(docx_filename, 'wb') as f:
+                    f.write(docx_bytes)
+                docx_filenames.append(docx_filename)
+
+            results = []
+            for pdf_filename, error in self.convert_many(docx_filenames, work_dir):
+                if error:
+                    results.append((None, error))
+                else:
+                    with open(pdf_filename, 'rb') as f:
+                        results.append((f.read(), None))
+            return results
+
+    def convert_bytes(self, docx_bytes):
+        """Convert one in-memory DOCX document to PDF bytes"""
+        pdf_bytes, error = self.convert_bytes_batch([docx_bytes])[0]
+        if error:
+            raise Exception(error)
+        return pdf_bytes
+
+    def stats(self):
+        """Report pool size, utilisation and lifetime counters"""
+        with self._lock:
+            return {
+                'size': self.size,
+                'busy': self._busy,
+                'jobs': self._jobs,
+                'failures': self._failures,
+                'restarts': sum(worker.restarts for worker in self._workers),
+                'uno': self.use_uno,
+                'mode': self.mode,
+            }
+
+    def shutdown(self):
+        """Stop every worker and remove their profiles"""
+        with self._lock:
+            workers, self._workers = self._workers, []
+        for worker in workers:
+            worker.close()
+
+
+class BatchingConverter:
+    """Collects conversions for a short window and runs them as one LibreOffice batch"""
+
+    def __init__(self, pool, window=0.05, max_batch=8):
+        self.pool = pool
+        self.window = window
+        self.max_batch = max_batch
+        self._pending = []  # (docx bytes, Future)
+        self._timer = None
+        self._lock = threading.Lock()
+
+    def _take_pending(self):
+        batch, self._pending = self._pending, []
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        return batch
+
+    def _flush(self):
+        with self._lock:
+            batch = self._take_pending()
+        self._run(batch)
+
+    def _run(self, batch):
+        if not batch:
+            return
+        try:
+            results = self.pool.convert_bytes_batch([docx_bytes for docx_bytes, _ in batch])
+        except Exception as e:
+            results = [(None, str(e))] * len(batch)
+
+        # Map each output back to the request that submitted it
+        for (_, future), (pdf_bytes, error) in zip(batch, results):
+            if error:
+                future.set_exception(Exception(error))
+            else:
+                future.set_result(pdf_bytes)
+
+    def convert_bytes(self, docx_bytes):
+        """Queue a document for the next batch and wait for its PDF bytes"""
+        future = Future()
+        batch = None
+        with self._lock:
+            self._pending.append((docx_bytes, future))
+            if len(self._pending) >= self.max_batch:
+                batch = self._take_pending()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.window, self._flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+        # A full batch is converted right away on the thread that filled it
+        if batch:
+            self._run(batch)
+        return future.result()
+
+    def convert_bytes_batch(self, documents):
+        """Explicit batches skip the collection window"""
+        return self.pool.convert_bytes_batch(documents)
+
+    def stats(self):
+        stats = self.pool.stats()
+        with self._lock:
+            stats['batch_pending'] = len(self._pending)
+        return stats
+
+
+_pool = None
+_converter = None
+_pool_lock = threading.Lock()
+
+
+def get_converter_pool():
+    """Return the process-wide converter pool, configured from the environment"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ConverterPool(
+                size=int(os.environ.get('SOFFICE_POOL_SIZE', 2)),
+                max_jobs_per_worker=int(os.environ.get('SOFFICE_MAX_JOBS', 50)),
+                job_timeout=int(os.environ.get('SOFFICE_TIMEOUT', 30)),
+            )
+            atexit.register(_pool.shutdown)
+        return _pool
+
+
+def get_document_converter():
+    """Return the pool, wrapped in a BatchingConverter when SOFFICE_BATCH_WINDOW_MS is set"""
+    global _converter
+    pool = get_converter_pool()
+    with _pool_lock:
+        if _converter is None:
+            window_ms = int(os.environ.get('SOFFICE_BATCH_WINDOW_MS', 0))
+            if window_ms > 0:
+                _converter = BatchingConverter(
+                    pool, window=window_ms / 1000.0,
+                    max_batch=int(os.environ.get('SOFFICE_BATCH_MAX', 8)))
+            else:
+                _converter = pool
+        return _converter
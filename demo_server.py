@@ -1,17 +1,37 @@
-from flask import Flask, request, jsonify, send_file, render_template_string
+from flask import Flask, g, request, jsonify, send_file, render_template_string, stream_with_context
 from flask_cors import CORS
-from docxtpl import DocxTemplate, InlineImage
-from docx.shared import Mm, Pt
-from docx import Document
+from docxtpl import InlineImage
+from docx.shared import Inches, Mm, Pt
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsdecls
+from docx.parts.hdrftr import FooterPart, HeaderPart
+from docx.text.run import Run
+from lxml import etree
+from xml.sax.saxutils import escape
+import copy
+import hashlib
+import shutil
+import io
 import os
-import subprocess
+import re
 import json
 import tempfile
 import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 import threading
 import time
-from jinja2 import Template
+from jinja2 import ChoiceLoader, Environment, FileSystemBytecodeCache, FileSystemLoader, PrefixLoader, TemplateNotFound
+from batch_output import merge_pdfs, stream_zip
+from converter_pool import get_converter_pool, get_document_converter
+from html_renderer import css_file, css_string, get_html_renderer
+from job_queue import JobQueue, QueueClosed, QueueFull
+from logo_registry import logo_registry
+from metrics import begin_trace, end_trace, labelled, registry as metrics_registry, size_class, span, track_render
+from pdf_cache import get_pdf_cache
+from single_flight import SingleFlight
+from template_registry import slugify, template_catalog, template_registry
+from tiptap_html import convert_tiptap_to_html
 
 app = Flask(__name__)
 CORS(app)
@@ -19,19 +39,56 @@ CORS(app)
 # Store active sessions and their state
 sessions = {}
 
-def format_agenda_sections(sections_data):
-    """Format agenda sections from form data"""
-    formatted_sections = []
+# Parse the DOCX templates once at startup; requests get clones
+template_registry.preload([
+    "templates/comprehensive_agenda_template.docx",
+    "templates/dublin-agenda-word-template.docx",
+])
+
+# City logos, read once with downscaled copies for the size they are printed at.
+# A payload picks one with its "logo" key (the file name without extension)
+LOGO_DIR = os.environ.get('LOGO_DIR', 'assets')
+DEFAULT_LOGO = 'sausalito'
+CITY_LOGO_SIZE = Mm(30)
+logo_registry.load(LOGO_DIR, display_widths=[CITY_LOGO_SIZE], dpi=int(os.environ.get('LOGO_DPI', 300)))
+
+# Shared environment for HTML templates. Set JINJA_BYTECODE_CACHE_DIR to keep
+# compiled templates on disk so a fresh process skips compilation too
+bytecode_cache_dir = os.environ.get('JINJA_BYTECODE_CACHE_DIR')
+if bytecode_cache_dir:
+    os.makedirs(bytecode_cache_dir, exist_ok=True)
+# Tenant HTML templates resolve under a prefix and, like their DOCX templates, load
+# on first use; compiled templates are kept in a bounded LRU
+builtin_html_loader = FileSystemLoader("templates")
+TENANT_HTML_PREFIX = 'tenants'
+html_templates = Environment(
+    loader=ChoiceLoader([
+        builtin_html_loader,
+        PrefixLoader({TENANT_HTML_PREFIX: FileSystemLoader(template_catalog.root)}),
+    ]),
+    auto_reload=True,
+    cache_size=int(os.environ.get('HTML_TEMPLATE_CACHE_SIZE', 400)),
+    bytecode_cache=FileSystemBytecodeCache(bytecode_cache_dir) if bytecode_cache_dir else None,
+)
+
+# Compile the built-in HTML templates at startup rather than on the first request
+for template_name in builtin_html_loader.list_templates():
+    if template_name.endswith('.html'):
+        html_templates.get_template(template_name)
+
+def build_agenda_lines(sections_data):
+    """Lay out agenda sections from form data as (kind, text) lines"""
+    lines = []
     for section in sections_data:
         if section.get('type') == 'break':
             # Handle section breaks with enhanced formatting
             break_title = section.get('title', '────────────────────────────────────────')
             # Add centered section break with visual separators
-            formatted_sections.append("") # Empty line before
-            formatted_sections.append("═" * 60) # Top border
-            formatted_sections.append(f"{'═' * 10} {break_title.center(36)} {'═' * 10}")
-            formatted_sections.append("═" * 60) # Bottom border
-            formatted_sections.append("") # Empty line after
+            lines.append(('blank', "")) # Empty line before
+            lines.append(('break_border', "═" * 60)) # Top border
+            lines.append(('break_title', f"{'═' * 10} {break_title.center(36)} {'═' * 10}"))
+            lines.append(('break_border', "═" * 60)) # Bottom border
+            lines.append(('blank', "")) # Empty line after
         else:
             # Handle regular sections
             section_number = section.get('number', '')
@@ -40,134 +97,231 @@ def format_agenda_sections(sections_data):
                 section_text = f"{section_number}. {section_title}"
             else:
                 section_text = section_title
-            formatted_sections.append(section_text)
-            formatted_sections.append("")
+            lines.append(('section', section_text))
+            lines.append(('blank', ""))
             
             for item in section.get('items', []):
                 if item.get('prefix') or item.get('number'):
                     item_text = f"     {item.get('prefix', '')}{item.get('number', '')} {item['title']}"
                 else:
                     item_text = f"     {item['title']}"
-                formatted_sections.append(item_text)
+                lines.append(('item', item_text))
                 
                 if item.get('attachments'):
                     for attachment in item['attachments']:
-                        formatted_sections.append(f"          Attachment: {attachment}")
+                        lines.append(('attachment', f"          Attachment: {attachment}"))
             
-            formatted_sections.append("")
+            lines.append(('blank', ""))
     
-    return "\n".join(formatted_sections)
+    return lines
 
-def apply_section_break_formatting(doc, agenda_content):
-    """Apply enhanced formatting to section breaks in the document"""
-    try:
-        from docx.shared import Pt
-        from docx.enum.text import WD_ALIGN_PARAGRAPH
+# Run formatting for section break lines, which take precedence over the document font size
+SECTION_BREAK_STYLES = {
+    'break_border': {'bold': True, 'size': Pt(12)},
+    'break_title': {'bold': True, 'size': Pt(14)},
+}
+
+AGENDA_PLACEHOLDER = "{{agenda_content}}"
+
+def find_placeholder_runs(doc, placeholder):
+    """Return the runs whose whole text is the given placeholder"""
+    return [text.getparent() for text in doc.element.body.xpath(f'.//w:t[.="{placeholder}"]')]
+
+def agenda_run_properties(base_rpr, line_styles):
+    """Serialize the run formatting for each line kind, starting from the placeholder run's own"""
+    base_run = parse_xml(f'<w:r {nsdecls("w")}/>')
+    if base_rpr is not None:
+        base_run.append(copy.deepcopy(base_rpr))
+    
+    properties = {None: etree.tostring(base_run.rPr, encoding='unicode') if base_run.rPr is not None else ''}
+    for kind, style in (line_styles or {}).items():
+        styled_run = copy.deepcopy(base_run)
+        font = Run(styled_run, None).font
+        font.bold = style.get('bold')
+        font.size = style.get('size')
+        properties[kind] = etree.tostring(styled_run.rPr, encoding='unicode')
+    return properties
+
+# Characters docxtpl expands into tabs, breaks and paragraphs when it renders a value
+LISTING_CHARACTERS = ('\t', '\a', '\n', '\f')
+LISTING_SPLIT = re.compile('([\t\a\n\f])')
+PAGE_BREAK_PARAGRAPH = '<w:r><w:br w:type="page"/></w:r>'
+
+def agenda_paragraphs(lines, properties):
+    """Lay out agenda lines as the run XML of one or more paragraphs
+    
+    Consecutive lines that share formatting go in the same run. Like docxtpl, a tab
+    or newline inside a line becomes <w:tab/> or <w:br/>, \\a starts a new paragraph
+    and \\f a new paragraph after a page break.
+    """
+    default = properties[None]
+    paragraphs = []
+    parts = []
+    current = None
+    for index, (kind, text) in enumerate(lines):
+        run_properties = properties.get(kind, default)
+        if run_properties != current:
+            if current is not None:
+                parts.append('</w:r>')
+            parts.append(f'<w:r>{run_properties}')
+            current = run_properties
         
-        for paragraph in doc.paragraphs:
-            text = paragraph.text.strip()
-            
-            # Check if this is a section break line
-            if text.startswith('═') and len(text) >= 60:
-                # Center the section break
-                paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
-                
-                # Apply formatting to the section break
-                for run in paragraph.runs:
-                    run.font.bold = True
-                    run.font.size = Pt(12)
-                    
-                    # If this is the title line (middle line with text), make it larger
-                    if len(text) > 60 and '═' in text and not text.replace('═', '').replace(' ', '').isdigit():
-                        run.font.size = Pt(14)
-                        run.font.bold = True
+        for token in LISTING_SPLIT.split(text):
+            if token == '\n':
+                parts.append('<w:br/>')
+            elif token == '\t':
+                parts.append('<w:tab/>')
+            elif token in ('\a', '\f'):
+                parts.append('</w:r>')
+                paragraphs.append(''.join(parts))
+                if token == '\f':
+                    paragraphs.append(PAGE_BREAK_PARAGRAPH)
+                parts = [f'<w:r>{run_properties}']
+            else:
+                parts.append(f'<w:t xml:space="preserve">{escape(token)}</w:t>')
+        if index < len(lines) - 1:
+            parts.append('<w:br/>')
+    if current is not None:
+        parts.append('</w:r>')
+    paragraphs.append(''.join(parts))
+    return paragraphs
+
+def insert_agenda_lines(doc, lines, line_styles=None):
+    """Swap the rendered agenda placeholder for prebuilt runs carrying each line's formatting"""
+    for anchor in find_placeholder_runs(doc, AGENDA_PLACEHOLDER):
+        properties = agenda_run_properties(anchor.rPr, line_styles)
         
-        return True
+        # Build the whole agenda as one XML string and parse it once
+        paragraphs = agenda_paragraphs(lines, properties)
+        fragment = parse_xml(f'<w:body {nsdecls("w")}>{"".join(f"<w:p>{runs}</w:p>" for runs in paragraphs)}</w:body>')
+        first, *following = list(fragment)
         
-    except Exception as e:
-        print(f"Section break formatting failed: {e}")
-        return False
+        paragraph = anchor.getparent()
+        position = paragraph.index(anchor)
+        tail = list(paragraph)[position + 1:]
+        paragraph[position:] = list(first)
+        if not following:
+            paragraph.extend(tail)
+            continue
+        
+        # Agenda paragraphs take the placeholder paragraph's properties (page breaks stay bare);
+        # whatever followed the placeholder moves to the last one
+        previous = paragraph
+        for index, new_paragraph in enumerate(following):
+            is_page_break = paragraphs[index + 1] == PAGE_BREAK_PARAGRAPH
+            if paragraph.pPr is not None and not is_page_break:
+                new_paragraph.insert(0, copy.deepcopy(paragraph.pPr))
+            previous.addnext(new_paragraph)
+            previous = new_paragraph
+        previous.extend(tail)
+
+def apply_run_fonts(runs, fonts):
+    """Apply heading or body font to each run, classified by its current size"""
+    for run in runs:
+        if run.font.size and run.font.size >= Pt(16):
+            # This is likely a heading
+            run.font.name = fonts['heading_font']
+            run.font.size = fonts['heading_size']
+        else:
+            # This is regular text
+            run.font.name = fonts['document_font']
+            run.font.size = fonts['font_size']
+
+# Runs the font walk reaches: those of top-level paragraphs, and of paragraphs in
+# top-level table cells other than vertical-merge continuations (python-docx
+# reports those as the cell above, so their own paragraphs are never visited)
+BODY_PARAGRAPHS_WITH_TEXT = './w:p[w:r/w:t]'
+TABLE_CELL_RUNS = './w:tbl/w:tr/w:tc[not(w:tcPr/w:vMerge[not(@w:val) or @w:val="continue"])]/w:p/w:r'
 
-def apply_font_customization(docx_filename, font_settings):
-    """Apply font customization and margins to the generated Word document"""
+def apply_fonts(doc, fonts):
+    """Apply heading or body fonts to every run the walk below reaches, via XPath on the body
+    
+    Same classification and XML as apply_fonts_by_walk, without building paragraph,
+    cell and run proxies or re-resolving merged cells for every table row.
+    """
+    body = doc.element.body
+    runs = body.xpath(TABLE_CELL_RUNS)
+    for paragraph in body.xpath(BODY_PARAGRAPHS_WITH_TEXT):
+        # Only modify fonts of non-empty paragraphs; tabs and breaks are whitespace
+        if ''.join(paragraph.xpath('./w:r/w:t/text()')).strip():
+            runs.extend(paragraph.r_lst)
+    
+    # Runs without properties are body text; they get a copy of one prebuilt rPr
+    body_run = parse_xml(f'<w:r {nsdecls("w")}/>')
+    apply_run_fonts([Run(body_run, None)], fonts)
+    body_rpr = body_run.rPr
+    
+    heading_threshold = Pt(16)
+    for run in runs:
+        rPr = run.rPr
+        if rPr is None:
+            run.insert(0, copy.deepcopy(body_rpr))
+            continue
+        
+        size = rPr.sz_val
+        if size and size >= heading_threshold:
+            name, size = fonts['heading_font'], fonts['heading_size']
+        else:
+            name, size = fonts['document_font'], fonts['font_size']
+        rPr.rFonts_ascii = name
+        rPr.rFonts_hAnsi = name
+        rPr.sz_val = size
+
+def apply_fonts_by_walk(doc, fonts):
+    """Original python-docx walk, kept as the reference for benchmarks"""
+    for paragraph in doc.paragraphs:
+        # Only modify fonts of non-empty paragraphs
+        if paragraph.text.strip():
+            apply_run_fonts(paragraph.runs, fonts)
+    
+    # Apply fonts to tables
+    for table in doc.tables:
+        for row in table.rows:
+            for cell in row.cells:
+                for paragraph in cell.paragraphs:
+                    apply_run_fonts(paragraph.runs, fonts)
+
+def resolve_fonts(font_settings):
+    """Get font settings with defaults, or None when no customization was requested"""
+    if not font_settings:
+        return None
+    return {
+        'document_font': font_settings.get('document_font', 'Times New Roman'),
+        'heading_font': font_settings.get('heading_font', 'Times New Roman'),
+        'font_size': Pt(font_settings.get('font_size', 12)),
+        'heading_size': Pt(font_settings.get('heading_size', 18)),
+    }
+
+def apply_document_settings(doc, font_settings):
+    """Apply margins and fonts to a template before rendering
+    
+    Formatting set on placeholder runs carries through docxtpl rendering, so this
+    walks the small template instead of the rendered document.
+    """
     try:
-        # Open the document
-        doc = Document(docx_filename)
-        
-        # Get font settings with defaults
-        document_font = font_settings.get('document_font', 'Times New Roman')
-        heading_font = font_settings.get('heading_font', 'Times New Roman')
-        font_size = font_settings.get('font_size', 12)
-        heading_size = font_settings.get('heading_size', 18)
-        
-        # Get margin settings with defaults (in inches)
-        margin_top = font_settings.get('margin_top', 1)
-        margin_bottom = font_settings.get('margin_bottom', 1)
-        margin_left = font_settings.get('margin_left', 1)
-        margin_right = font_settings.get('margin_right', 1)
-        
-        # Apply margins to all sections
-        from docx.shared import Inches
+        fonts = resolve_fonts(font_settings)
+        if not fonts:
+            return True
+        
+        # Apply margins to all sections (settings are in inches)
         for section in doc.sections:
-            section.top_margin = Inches(margin_top)
-            section.bottom_margin = Inches(margin_bottom)
-            section.left_margin = Inches(margin_left)
-            section.right_margin = Inches(margin_right)
-        
-        # Apply fonts to all paragraphs
-        for paragraph in doc.paragraphs:
-            if paragraph.text.strip():  # Only modify non-empty paragraphs
-                for run in paragraph.runs:
-                    if run.font.size and run.font.size >= Pt(16):
-                        # This is likely a heading
-                        run.font.name = heading_font
-                        run.font.size = Pt(heading_size)
-                    else:
-                        # This is regular text
-                        run.font.name = document_font
-                        run.font.size = Pt(font_size)
-        
-        # Apply fonts to tables
-        for table in doc.tables:
-            for row in table.rows:
-                for cell in row.cells:
-                    for paragraph in cell.paragraphs:
-                        for run in paragraph.runs:
-                            if run.font.size and run.font.size >= Pt(16):
-                                # This is likely a heading
-                                run.font.name = heading_font
-                                run.font.size = Pt(heading_size)
-                            else:
-                                # This is regular text
-                                run.font.name = document_font
-                                run.font.size = Pt(font_size)
-        
-        # Save the modified document
-        doc.save(docx_filename)
+            section.top_margin = Inches(font_settings.get('margin_top', 1))
+            section.bottom_margin = Inches(font_settings.get('margin_bottom', 1))
+            section.left_margin = Inches(font_settings.get('margin_left', 1))
+            section.right_margin = Inches(font_settings.get('margin_right', 1))
+        
+        apply_fonts(doc, fonts)
         
         return True
         
     except Exception as e:
-        print(f"Font customization failed: {e}")
+        print(f"Applying document settings failed: {e}")
         return False
 
-def generate_word_document(template_data):
-    """Generate Word document from template data"""
-    template_path = "templates/comprehensive_agenda_template.docx"
-    logo_path = "assets/sausalito.jpeg"
-    
-    if not os.path.exists(template_path):
-        raise FileNotFoundError(f"Template not found: {template_path}")
-    if not os.path.exists(logo_path):
-        raise FileNotFoundError(f"Logo not found: {logo_path}")
-    
-    tpl = DocxTemplate(template_path)
-    city_logo = InlineImage(tpl, logo_path, width=Mm(30), height=Mm(30))
-    
-    # Process the template data
-    context = {
+def build_agenda_context(template_data):
+    """Build the meeting details shared by the Word template and the HTML preview"""
+    return {
         "city_name": template_data.get("city_name", "City Name"),
-        "city_logo": city_logo,
         "meeting_type": template_data.get("meeting_type", "Regular Meeting"),
         "location": {"address": template_data.get("address", "City Hall")},
         "meeting_date": template_data.get("meeting_date", "Date TBD"),
@@ -178,7 +332,6 @@ def generate_word_document(template_data):
             "passcode": template_data.get("zoom_passcode", "123456"),
             "phone_list": template_data.get("zoom_phone", "+1 669 900 6833")
         },
-        "agenda_content": format_agenda_sections(template_data.get("agenda_sections", [])),
         "lead_department": {
             "name": template_data.get("department_name", "Administration Department"),
             "address": template_data.get("address", "City Hall"),
@@ -188,86 +341,204 @@ def generate_word_document(template_data):
         "council_list": template_data.get("council_members", ""),
         "staff_list": template_data.get("staff_list", ""),
     }
+
+# Built-in template file of each template type that reads one; a city can provide
+# its own as <TEMPLATE_ROOT>/<city>/<meeting type>/<template type>.docx|.html
+DEFAULT_TEMPLATE_FILES = {
+    'sausalito-agenda': "templates/comprehensive_agenda_template.docx",
+    'dublin-word': "templates/dublin-agenda-word-template.docx",
+    'dublin-agenda': "templates/dublin-agenda-template.html",
+}
+
+def resolve_template_file(template_data, template_type):
+    """Return the city's own template for this payload when one exists, else the built-in one"""
+    default = DEFAULT_TEMPLATE_FILES[template_type]
+    city = template_data.get("city_name")
+    if city and slugify(city):
+        path = template_catalog.find(city, template_data.get("meeting_type"), template_type,
+                                     os.path.splitext(default)[1])
+        if path is not None:
+            return path
+    return default
+
+def html_template_name(path):
+    """Name the Jinja environment knows a template file by"""
+    tenant_path = os.path.relpath(path, template_catalog.root)
+    if not tenant_path.startswith('..'):
+        return f"{TENANT_HTML_PREFIX}/{tenant_path.replace(os.sep, '/')}"
+    return os.path.relpath(path, "templates").replace(os.sep, '/')
+
+def get_logo(template_data):
+    """Look up the logo a payload asks for, defaulting to the Sausalito seal"""
+    name = template_data.get("logo") or DEFAULT_LOGO
+    try:
+        return logo_registry.get(name)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Logo not found: {name} (looked in {LOGO_DIR})")
+
+def generate_word_document(template_data):
+    """Generate Word document from template data"""
+    template_path = resolve_template_file(template_data, 'sausalito-agenda')
+    
+    with span('template_load'):
+        try:
+            tpl = template_registry.get_template(template_path)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Template not found: {template_path}")
+        logo = get_logo(template_data)
     
-    tpl.render(context)
+    # Process the template data
+    with span('context_build'):
+        context = build_agenda_context(template_data)
+        logo_bytes = logo.image_for(CITY_LOGO_SIZE, logo_registry.dpi)
+        context["city_logo"] = InlineImage(tpl, io.BytesIO(logo_bytes), width=CITY_LOGO_SIZE, height=CITY_LOGO_SIZE)
+        agenda_lines = build_agenda_lines(template_data.get("agenda_sections", []))
     
-    # Create temporary file
-    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.docx')
-    tpl.save(temp_file.name)
+    # Fonts and margins go on the template; the placeholder run's formatting is reused for the agenda
+    with span('document_settings'):
+        apply_document_settings(tpl.docx, template_data.get('font_settings', {}))
     
-    # Apply font customization if provided
-    font_settings = template_data.get('font_settings', {})
-    if font_settings:
-        apply_font_customization(temp_file.name, font_settings)
+    # Leave the agenda placeholder in place while rendering, then swap in prebuilt runs
+    structured = bool(find_placeholder_runs(tpl.docx, AGENDA_PLACEHOLDER))
+    context["agenda_content"] = AGENDA_PLACEHOLDER if structured else "\n".join(text for _, text in agenda_lines)
     
-    # Apply section break formatting
-    try:
-        doc = Document(temp_file.name)
-        apply_section_break_formatting(doc, context["agenda_content"])
-        doc.save(temp_file.name)
-    except Exception as e:
-        print(f"Section break formatting failed: {e}")
+    with span('docxtpl_render'):
+        tpl.render(context)
+    if structured:
+        with span('agenda_insert'):
+            insert_agenda_lines(tpl.docx, agenda_lines, SECTION_BREAK_STYLES)
+    
+    # Serialize once into memory
+    with span('docx_save'):
+        docx_buffer = io.BytesIO()
+        tpl.save(docx_buffer)
+        docx_buffer.seek(0)
     
-    return temp_file.name
+    return docx_buffer
+
+DATE_PLACEHOLDER = "{{meeting_date}}"
+
+def find_placeholder_texts(doc, placeholder):
+    """Return the text elements, in the body, headers and footers, whose whole text is the placeholder"""
+    roots = [doc.element] + [part.element for part in doc.part.package.iter_parts()
+                             if isinstance(part, (HeaderPart, FooterPart))]
+    return [text for root in roots for text in root.xpath(f'.//w:t[.="{placeholder}"]')]
+
+def prerender_dublin_cover(template_path, font_settings):
+    """Return a copy of the Dublin Word template with everything but the date and agenda rendered
+    
+    The councilmember header, logo, location block and procedures box are identical
+    in every request, so docxtpl renders them once per font setting instead of per request.
+    Returns None for a template whose placeholders do not render as whole runs.
+    """
+    def build(tpl):
+        apply_document_settings(tpl.docx, font_settings)
+        tpl.render({"meeting_date": DATE_PLACEHOLDER, "agenda_content": AGENDA_PLACEHOLDER})
+        # Decided once per template, so one that can never be filled in skips the copy on every request
+        return bool(find_placeholder_texts(tpl.docx, DATE_PLACEHOLDER)
+                    and find_placeholder_runs(tpl.docx, AGENDA_PLACEHOLDER))
+    
+    variant = json.dumps(font_settings or {}, sort_keys=True)
+    return template_registry.get_prerendered(template_path, variant, build)
 
 def generate_dublin_word_document(template_data):
     """Generate Dublin Word document from template data"""
-    template_path = "templates/dublin-agenda-word-template.docx"
+    meeting_date = str(template_data.get("meeting_date", "Date TBD"))
+    font_settings = template_data.get('font_settings', {})
+    template_path = resolve_template_file(template_data, 'dublin-word')
     
-    if not os.path.exists(template_path):
-        raise FileNotFoundError(f"Dublin Word template not found: {template_path}")
+    if not any(character in meeting_date for character in LISTING_CHARACTERS):
+        with span('template_load'):
+            try:
+                doc = prerender_dublin_cover(template_path, font_settings)
+            except FileNotFoundError:
+                raise FileNotFoundError(f"Dublin Word template not found: {template_path}")
+        
+        if doc is not None:
+            try:
+                # Only the date and the agenda differ between requests
+                with span('context_build'):
+                    agenda_lines = build_agenda_lines(template_data.get("agenda_sections", []))
+                    for text in find_placeholder_texts(doc, DATE_PLACEHOLDER):
+                        text.text = meeting_date
+                with span('agenda_insert'):
+                    insert_agenda_lines(doc, agenda_lines)
+                
+                with span('docx_save'):
+                    docx_buffer = io.BytesIO()
+                    doc.save(docx_buffer)
+                    docx_buffer.seek(0)
+                
+                return docx_buffer
+                
+            except Exception as e:
+                raise Exception(f"Dublin Word document generation failed: {str(e)}")
+    
+    # Values docxtpl would expand, or a template without whole-run placeholders, take the full render
+    return render_dublin_word_template(template_data, template_path)
+
+def render_dublin_word_template(template_data, template_path):
+    """Generate Dublin Word document by rendering the whole template with docxtpl"""
+    
+    with span('template_load'):
+        try:
+            tpl = template_registry.get_template(template_path)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Dublin Word template not found: {template_path}")
     
     try:
-        from docxtpl import DocxTemplate
         
-        # Load the template
-        tpl = DocxTemplate(template_path)
+        # Apply font customization if provided
+        with span('document_settings'):
+            apply_document_settings(tpl.docx, template_data.get('font_settings', {}))
         
         # Process the template data
-        context = {
-            "meeting_date": template_data.get("meeting_date", "Date TBD"),
-            "agenda_content": format_agenda_sections(template_data.get("agenda_sections", []))
-        }
-        
-        # Render the template
-        tpl.render(context)
+        with span('context_build'):
+            agenda_lines = build_agenda_lines(template_data.get("agenda_sections", []))
+            structured = bool(find_placeholder_runs(tpl.docx, AGENDA_PLACEHOLDER))
+            context = {
+                "meeting_date": template_data.get("meeting_date", "Date TBD"),
+                "agenda_content": AGENDA_PLACEHOLDER if structured else "\n".join(text for _, text in agenda_lines)
+            }
         
-        # Create temporary file
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.docx')
-        temp_file.close()
+        # Render the template, then insert the agenda lines with the placeholder's formatting
+        with span('docxtpl_render'):
+            tpl.render(context)
+        if structured:
+            with span('agenda_insert'):
+                insert_agenda_lines(tpl.docx, agenda_lines)
         
-        # Save the document
-        tpl.save(temp_file.name)
-        
-        # Apply font customization if provided
-        font_settings = template_data.get('font_settings', {})
-        if font_settings:
-            apply_font_customization(temp_file.name, font_settings)
+        # Save the document into memory
+        with span('docx_save'):
+            docx_buffer = io.BytesIO()
+            tpl.save(docx_buffer)
+            docx_buffer.seek(0)
         
-        return temp_file.name
+        return docx_buffer
         
     except Exception as e:
         raise Exception(f"Dublin Word document generation failed: {str(e)}")
 
-def convert_to_pdf(docx_filename):
-    """Convert Word to PDF using LibreOffice"""
+def convert_to_pdf(docx_buffer):
+    """Convert an in-memory Word document to PDF using the pooled LibreOffice workers"""
     try:
-        output_dir = os.path.dirname(docx_filename)
-        result = subprocess.run([
-            'soffice', '--headless', '--convert-to', 'pdf',
-            '--outdir', output_dir, docx_filename
-        ], capture_output=True, text=True, timeout=30)
-        
-        if result.returncode == 0:
-            pdf_filename = docx_filename.replace('.docx', '.pdf')
-            if os.path.exists(pdf_filename):
-                return pdf_filename
-        
-        raise Exception(f"LibreOffice conversion failed: {result.stderr}")
+        with span('soffice_convert'):
+            return io.BytesIO(get_document_converter().convert_bytes(docx_buffer.getvalue()))
         
     except Exception as e:
         raise Exception(f"PDF conversion failed: {str(e)}")
 
+def convert_to_pdf_batch(docx_buffers):
+    """Convert several Word documents in a single LibreOffice run, returning (PDF buffer, error) per document"""
+    try:
+        with span('soffice_convert_batch'):
+            results = get_document_converter().convert_bytes_batch([buffer.getvalue() for buffer in docx_buffers])
+    except Exception as e:
+        return [(None, f"PDF conversion failed: {str(e)}")] * len(docx_buffers)
+    
+    return [(io.BytesIO(pdf_bytes), None) if pdf_bytes is not None else (None, f"PDF conversion failed: {error}")
+            for pdf_bytes, error in results]
+
 @app.route('/')
 def index():
     """Serve the main template editor interface"""
@@ -279,18 +550,14 @@ def index():
 
 def generate_dublin_html_document(template_data):
     """Generate HTML document for Dublin agenda using HTML template"""
-    template_path = "templates/dublin-agenda-template.html"
+    template_path = resolve_template_file(template_data, 'dublin-agenda')
     
-    if not os.path.exists(template_path):
+    # Compiled once and reused; recompiled only when the file changes
+    try:
+        template = html_templates.get_template(html_template_name(template_path))
+    except TemplateNotFound:
         raise FileNotFoundError(f"Template not found: {template_path}")
     
-    # Read the HTML template
-    with open(template_path, 'r') as f:
-        template_content = f.read()
-    
-    # Create Jinja2 template
-    template = Template(template_content)
-    
     # Prepare agenda items
     agenda_items = []
     for section in template_data.get("agenda_sections", []):
@@ -332,9 +599,6 @@ def generate_dublin_tiptap_document(template_data):
             <meta charset="UTF-8">
             <meta name="viewport" content="width=device-width, initial-scale=1.0">
             <title>Dublin City Council Agenda</title>
-            <style>
-                {get_dublin_styles()}
-            </style>
         </head>
         <body>
             <div class="dublin-cover-page">
@@ -544,88 +808,41 @@ def get_dublin_styles():
         }
     """
 
-def convert_tiptap_to_html(tiptap_content):
-    """Convert TipTap JSON content to HTML"""
-    if not tiptap_content:
-        return '<p>No content provided</p>'
-    
-    # For now, return the content as-is if it's already a string
-    if isinstance(tiptap_content, str):
-        return tiptap_content
-    
-    # If it's JSON, try to convert it to a simple HTML representation
-    try:
-        if isinstance(tiptap_content, dict) and tiptap_content.get('type') == 'doc':
-            html_parts = []
-            for node in tiptap_content.get('content', []):
-                html_parts.append(convert_tiptap_node_to_html(node))
-            return ''.join(html_parts)
-        else:
-            return str(tiptap_content)
-    except Exception:
-        return str(tiptap_content)
-
-def convert_tiptap_node_to_html(node):
-    """Convert a single TipTap node to HTML"""
-    if not node:
-        return ''
-    
-    node_type = node.get('type', '')
-    attrs = node.get('attrs', {})
-    content = node.get('content', [])
-    
-    if node_type == 'dublinParagraph':
-        attr_str = ''
-        if attrs.get('align') != 'left':
-            attr_str += f' data-align="{attrs.get("align")}"'
-        if attrs.get('spacing') != 'normal':
-            attr_str += f' data-spacing="{attrs.get("spacing")}"'
-        if attrs.get('variant') != 'body':
-            attr_str += f' data-variant="{attrs.get("variant")}"'
-        if attrs.get('color'):
-            attr_str += f' data-color="{attrs.get("color")}"'
-        
-        text_content = ''.join(convert_tiptap_node_to_html(child) for child in content)
-        return f'<p{attr_str}>{text_content}</p>'
-    
-    elif node_type == 'locationBlock':
-        content_html = ''.join(convert_tiptap_node_to_html(child) for child in content)
-        return f'<div class="location-block">{content_html}</div>'
-    
-    elif node_type == 'councilList':
-        content_html = ''.join(convert_tiptap_node_to_html(child) for child in content)
-        return f'<div class="council-list"><h3 class="council-title">COUNCILMEMBERS</h3><div class="council-members-content">{content_html}</div></div>'
-
-    elif node_type == 'coverHeader':
-        content_html = ''.join(convert_tiptap_node_to_html(child) for child in content)
-        return f'<div class="cover-header">{content_html}</div>'
-    
-    elif node_type == 'dublinLogo':
-        return '<div class="dublin-logo-container"><img src="data:image/svg+xml,<svg xmlns=\'http://www.w3.org/2000/svg\' viewBox=\'0 0 100 100\'><circle cx=\'50\' cy=\'50\' r=\'40\' fill=\'%232e8b57\'/><text x=\'50\' y=\'65\' text-anchor=\'middle\' fill=\'white\' font-size=\'36\'>☘</text></svg>" alt="Dublin City Logo" class="dublin-logo" width="80" height="80" /></div>'
-    
-    elif node_type == 'dublinTitle':
-        level = attrs.get('level', 'main')
-        text_content = ''.join(convert_tiptap_node_to_html(child) for child in content)
-        return f'<h1 class="dublin-title dublin-title-{level}">{text_content}</h1>'
-    
-    elif node_type == 'sectionBreak':
-        text = attrs.get('text', 'REGULAR MEETING 7:00 PM')
-        return f'<div class="section-break">{text}</div>'
-    
-    elif node_type == 'noticeBox':
-        title = attrs.get('title', 'Additional Meeting Procedures')
-        content_html = ''.join(convert_tiptap_node_to_html(child) for child in content)
-        return f'<div class="notice-box"><div class="notice-box-title">{title}</div><div class="notice-box-content">{content_html}</div></div>'
-    
-    elif node_type == 'text':
-        return node.get('text', '')
-    
-    elif node_type == 'hardBreak':
-        return '<br>'
-    
-    else:
-        # For other node types, just convert their content
-        return ''.join(convert_tiptap_node_to_html(child) for child in content)
+# Shared Sausalito stylesheet, with a fallback if the file doesn't exist
+SAUSALITO_CSS_PATH = os.path.join(os.path.dirname(__file__), 'public', 'sausalito-agenda.css')
+SAUSALITO_FALLBACK_CSS = """
+        @page { size: letter; margin: 1in; }
+        body { 
+            font-family: 'Times New Roman', Times, serif; 
+            font-size: 12pt; 
+            line-height: 1.4; 
+            color: #000000; 
+            background: white; 
+        }
+        h1, h2, h3 { font-weight: bold; margin-top: 20px; margin-bottom: 10px; }
+        p { margin-bottom: 12px; }
+        .section-heading { 
+            color: #1a365d; 
+            font-size: 16pt; 
+            text-transform: uppercase; 
+            border-bottom: 2px solid #1a365d; 
+            padding-bottom: 5px; 
+        }
+        .staff-report { 
+            background: #f7fafc; 
+            border-left: 4px solid #4299e1; 
+            padding: 15px; 
+            margin: 20px 0; 
+        }
+        .notice-box { 
+            border: 2px solid #e53e3e; 
+            background: #fed7d7; 
+            padding: 15px; 
+            margin: 20px 0; 
+            text-align: center; 
+        }
+        .page-break-before { page-break-before: always; }
+"""
 
 def generate_sausalito_word_document(template_data):
     """Generate Sausalito Word-style document from HTML content"""
@@ -634,48 +851,6 @@ def generate_sausalito_word_document(template_data):
         html_content = template_data.get('html_content', '')
         title = template_data.get('title', 'Sausalito City Council Agenda')
         
-        # Read the shared CSS file
-        css_file_path = os.path.join(os.path.dirname(__file__), 'public', 'sausalito-agenda.css')
-        sausalito_css = ""
-        try:
-            with open(css_file_path, 'r', encoding='utf-8') as css_file:
-                sausalito_css = css_file.read()
-        except FileNotFoundError:
-            # Fallback CSS if file doesn't exist
-            sausalito_css = """
-                @page { size: letter; margin: 1in; }
-                body { 
-                    font-family: 'Times New Roman', Times, serif; 
-                    font-size: 12pt; 
-                    line-height: 1.4; 
-                    color: #000000; 
-                    background: white; 
-                }
-                h1, h2, h3 { font-weight: bold; margin-top: 20px; margin-bottom: 10px; }
-                p { margin-bottom: 12px; }
-                .section-heading { 
-                    color: #1a365d; 
-                    font-size: 16pt; 
-                    text-transform: uppercase; 
-                    border-bottom: 2px solid #1a365d; 
-                    padding-bottom: 5px; 
-                }
-                .staff-report { 
-                    background: #f7fafc; 
-                    border-left: 4px solid #4299e1; 
-                    padding: 15px; 
-                    margin: 20px 0; 
-                }
-                .notice-box { 
-                    border: 2px solid #e53e3e; 
-                    background: #fed7d7; 
-                    padding: 15px; 
-                    margin: 20px 0; 
-                    text-align: center; 
-                }
-                .page-break-before { page-break-before: always; }
-            """
-        
         # Generate complete HTML document
         full_html = f"""
         <!DOCTYPE html>
@@ -684,9 +859,6 @@ def generate_sausalito_word_document(template_data):
             <meta charset="UTF-8">
             <meta name="viewport" content="width=device-width, initial-scale=1.0">
             <title>{title}</title>
-            <style>
-                {sausalito_css}
-            </style>
         </head>
         <body>
             {html_content}
@@ -699,88 +871,799 @@ def generate_sausalito_word_document(template_data):
     except Exception as e:
         raise Exception(f"Sausalito Word document generation failed: {str(e)}")
 
-def convert_html_to_pdf(html_content):
-    """Convert HTML to PDF using WeasyPrint"""
+def get_agenda_preview_styles():
+    """Get CSS for the HTML approximation of the Word-based agendas"""
+    return """
+        body {
+            font-family: 'Times New Roman', Times, serif;
+            font-size: 12pt;
+            line-height: 1.3;
+            color: #000;
+            background: white;
+        }
+
+        .agenda-preview {
+            max-width: 6.5in;
+            margin: 0 auto;
+        }
+
+        .agenda-header {
+            text-align: center;
+            margin-bottom: 20px;
+        }
+
+        .agenda-city-name {
+            font-size: 18pt;
+            font-weight: bold;
+        }
+
+        .agenda-meeting-type {
+            font-size: 14pt;
+            font-weight: bold;
+            margin-bottom: 12px;
+        }
+
+        .agenda-meeting-details,
+        .agenda-zoom {
+            margin-bottom: 12px;
+        }
+
+        .agenda-heading {
+            font-size: 16pt;
+            font-weight: bold;
+            text-decoration: underline;
+            margin-top: 12px;
+        }
+
+        .agenda-section {
+            margin-bottom: 12pt;
+        }
+
+        .agenda-section-title {
+            margin-bottom: 12pt;
+        }
+
+        .agenda-item-title {
+            margin-left: 0.4in;
+        }
+
+        .agenda-attachment {
+            margin-left: 0.8in;
+        }
+
+        .agenda-section-break {
+            text-align: center;
+            font-size: 14pt;
+            font-weight: bold;
+            border-top: 3px double #000;
+            border-bottom: 3px double #000;
+            padding: 4pt 0;
+            margin: 12pt 0;
+        }
+    """
+
+# Stylesheets applied by WeasyPrint, parsed once per worker instead of embedded in every document
+STYLESHEETS = {
+    'dublin-tiptap': css_string(get_dublin_styles()),
+    'sausalito-word': css_file(SAUSALITO_CSS_PATH, SAUSALITO_FALLBACK_CSS),
+    'agenda-preview': css_string(get_agenda_preview_styles()),
+}
+get_html_renderer().preload_stylesheets(STYLESHEETS.values())
+
+def convert_html_to_pdf(html_content, stylesheet=None):
+    """Convert HTML to PDF using the WeasyPrint process pool"""
     try:
-        # Import weasyprint inside function to avoid pango errors
-        import weasyprint
-        
-        # Create temporary file for PDF
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.pdf')
-        
-        # Generate PDF from HTML
-        weasyprint.HTML(string=html_content).write_pdf(temp_file.name)
+        stylesheets = [STYLESHEETS[stylesheet]] if stylesheet else []
         
-        return temp_file.name
+        # Generate PDF from HTML straight into memory
+        with span('weasyprint_render'):
+            return io.BytesIO(get_html_renderer().render(html_content, stylesheets))
     except Exception as e:
         raise Exception(f"HTML to PDF conversion failed: {str(e)}")
 
-@app.route('/api/generate-pdf', methods=['POST'])
-def generate_pdf():
-    """Generate PDF from template data"""
+# Files each template type reads while rendering besides its template file, used to key the PDF cache
+TEMPLATE_DEPENDENCIES = {
+    'dublin-agenda': [],
+    'dublin-word': [],
+    'dublin-tiptap': [],
+    'sausalito-word': [SAUSALITO_CSS_PATH],
+    'sausalito-agenda': [],
+}
+
+# Template types that embed the payload's city logo
+LOGO_TEMPLATE_TYPES = ('sausalito-agenda',)
+
+DOWNLOAD_NAMES = {
+    'dublin-agenda': 'dublin_agenda.pdf',
+    'dublin-word': 'dublin_word_agenda.pdf',
+    'dublin-tiptap': 'dublin_tiptap_agenda.pdf',
+    'sausalito-word': 'sausalito_word_agenda.pdf',
+    'sausalito-agenda': 'agenda.pdf',
+}
+
+def payload_size_class(data):
+    """Bucket a payload by agenda items, TipTap blocks and kilobytes of HTML for metric labels"""
     try:
-        data = request.json
-        template_type = data.get('template', 'sausalito-agenda')
-        
+        count = 0
+        sections = data.get('agenda_sections')
+        if isinstance(sections, list):
+            for section in sections:
+                items = section.get('items') if isinstance(section, dict) else None
+                count += (len(items) if isinstance(items, list) else 0) + 1
+        tiptap_content = data.get('tiptap_content')
+        if isinstance(tiptap_content, dict) and isinstance(tiptap_content.get('content'), list):
+            count += len(tiptap_content['content'])
+        html_content = data.get('html_content')
+        if isinstance(html_content, str):
+            count += len(html_content) // 1024
+        return size_class(count)
+    except Exception:
+        # Labelling a metric must never fail the request it describes
+        return 'unknown'
+
+def render_pdf(data):
+    """Render the requested template type to an in-memory PDF"""
+    template_type = data.get('template', 'sausalito-agenda')
+    
+    with track_render(template_type, payload_size_class(data)):
         if template_type == 'dublin-agenda':
             # Generate HTML document for Dublin agenda
-            html_content = generate_dublin_html_document(data)
+            with span('html_build'):
+                html_content = generate_dublin_html_document(data)
             
             # Convert HTML to PDF
-            pdf_file = convert_html_to_pdf(html_content)
-            
-            # Return PDF file
-            return send_file(pdf_file, as_attachment=True, download_name='dublin_agenda.pdf')
-        
-        elif template_type == 'dublin-word':
-            # Generate Dublin Word document
-            docx_file = generate_dublin_word_document(data)
-            
-            # Convert to PDF
-            pdf_file = convert_to_pdf(docx_file)
-            
-            # Clean up Word file
-            os.unlink(docx_file)
-            
-            # Return PDF file
-            return send_file(pdf_file, as_attachment=True, download_name='dublin_word_agenda.pdf')
+            return convert_html_to_pdf(html_content)
         
         elif template_type == 'dublin-tiptap':
             # Generate Dublin TipTap document
-            html_content = generate_dublin_tiptap_document(data)
+            with span('html_build'):
+                html_content = generate_dublin_tiptap_document(data)
             
             # Convert HTML to PDF
-            pdf_file = convert_html_to_pdf(html_content)
-            
-            # Return PDF file
-            return send_file(pdf_file, as_attachment=True, download_name='dublin_tiptap_agenda.pdf')
+            return convert_html_to_pdf(html_content, 'dublin-tiptap')
         
         elif template_type == 'sausalito-word':
             # Generate Sausalito Word-style document from HTML
-            html_content = generate_sausalito_word_document(data)
+            with span('html_build'):
+                html_content = generate_sausalito_word_document(data)
             
             # Convert HTML to PDF
-            pdf_file = convert_html_to_pdf(html_content)
-            
-            # Return PDF file
-            return send_file(pdf_file, as_attachment=True, download_name='sausalito_word_agenda.pdf')
+            return convert_html_to_pdf(html_content, 'sausalito-word')
         
         else:
-            # Generate Word document for agenda (Sausalito)
-            docx_file = generate_word_document(data)
+            # Generate Word document for agenda (Sausalito or Dublin)
+            docx_buffer = render_docx(data)
             
             # Convert to PDF
-            pdf_file = convert_to_pdf(docx_file)
-            
-            # Clean up Word file
-            os.unlink(docx_file)
-            
-            # Return PDF file
-            return send_file(pdf_file, as_attachment=True, download_name='agenda.pdf')
+            return convert_to_pdf(docx_buffer)
+
+def pdf_cache_key(data, template_type):
+    """Key a payload by its content, its template's files and the logo it embeds"""
+    dependencies = list(TEMPLATE_DEPENDENCIES[template_type])
+    if template_type in DEFAULT_TEMPLATE_FILES:
+        dependencies.insert(0, resolve_template_file(data, template_type))
+    
+    digests = ()
+    if template_type in LOGO_TEMPLATE_TYPES:
+        try:
+            digests = (get_logo(data).sha1,)
+        except FileNotFoundError:
+            pass  # Rendering reports the missing logo
+    return get_pdf_cache().key_for(data, dependencies, digests)
+
+def resolve_template_type(data):
+    """Map a payload to a known template type, defaulting to the Sausalito agenda"""
+    template_type = data.get('template', 'sausalito-agenda')
+    if template_type not in DOWNLOAD_NAMES:
+        template_type = 'sausalito-agenda'
+    return template_type
+
+# Identical payloads generated at the same moment (e.g. a shared agenda) render once
+pdf_flights = SingleFlight()
+
+def render_and_cache_pdf(data, cache_key):
+    """Render a PDF and store it, returning the cached path or, if not cacheable, the bytes"""
+    cache = get_pdf_cache()
+    # A render that finished just before this flight started has already filled the cache
+    pdf_file = cache.get(cache_key, record=False)
+    if pdf_file is not None:
+        return pdf_file
+    
+    pdf_bytes = render_pdf(data).getvalue()
+    with span('cache_store'):
+        cached_file = cache.put(cache_key, pdf_bytes)
+    return cached_file or pdf_bytes
+
+def get_or_render_pdf(data, cache_key):
+    """Return a cached PDF path, or render and cache the PDF, along with HIT/MISS/COALESCED"""
+    cache = get_pdf_cache()
+    with labelled(resolve_template_type(data), payload_size_class(data)):
+        with span('cache_lookup'):
+            pdf_file = cache.get(cache_key)
+        if pdf_file is not None:
+            return pdf_file, 'HIT'
+        
+        result, shared = pdf_flights.do(cache_key, lambda: render_and_cache_pdf(data, cache_key))
+        # Fall back to serving the bytes when the PDF is not cacheable; each caller gets its own buffer
+        pdf_file = io.BytesIO(result) if isinstance(result, bytes) else result
+        return pdf_file, 'COALESCED' if shared else 'MISS'
+
+def send_cached_pdf(pdf_file, **options):
+    """send_file for an open cached PDF, with the Content-Length and Range support a path gets"""
+    stat = os.fstat(pdf_file.fileno())
+    response = send_file(pdf_file, mimetype='application/pdf', conditional=False, **options)
+    response.content_length = stat.st_size
+    response.last_modified = stat.st_mtime
+    return response.make_conditional(request, accept_ranges=True, complete_length=stat.st_size)
+
+@app.route('/api/generate-pdf', methods=['POST'])
+def generate_pdf():
+    """Generate PDF from template data, serving repeats from the PDF cache"""
+    try:
+        data = request.json
+        template_type = resolve_template_type(data)
+        cache_key = pdf_cache_key(data, template_type)
+        
+        # The key is content-addressed, so a matching ETag means the client already has this PDF
+        if cache_key in request.if_none_match:
+            response = app.response_class(status=304)
+            response.set_etag(cache_key)
+            return response
+        
+        pdf_file, cache_status = get_or_render_pdf(data, cache_key)
+        
+        # send_file streams the PDF in chunks with a Content-Length instead of loading it whole
+        if isinstance(pdf_file, io.BytesIO):
+            response = send_file(pdf_file, mimetype='application/pdf', as_attachment=True,
+                                 download_name=DOWNLOAD_NAMES[template_type], etag=cache_key)
+        else:
+            # Open right away so an eviction by another worker cannot remove the file mid-response
+            response = send_cached_pdf(open(pdf_file, 'rb'), as_attachment=True,
+                                       download_name=DOWNLOAD_NAMES[template_type], etag=cache_key)
+            # Viewers can re-fetch the cached copy by GET, with range requests
+            response.headers['Content-Location'] = f'/api/pdf/{cache_key}'
+        response.headers['X-Cache'] = cache_status
+        return response
         
     except Exception as e:
         return f"PDF generation failed: {str(e)}", 500
 
+@app.route('/api/pdf/<cache_key>', methods=['GET'])
+def cached_pdf(cache_key):
+    """Stream a previously generated PDF, honouring Range requests from the viewer"""
+    pdf_file = get_pdf_cache().open(cache_key)
+    if pdf_file is None:
+        return jsonify({'error': 'PDF not found or expired'}), 404
+    
+    return send_cached_pdf(pdf_file, download_name='agenda.pdf', etag=cache_key)
+
+def generate_pdf_file(data):
+    """Render a payload through the PDF cache, returning the cached path (bytes if not cacheable) and download name"""
+    template_type = resolve_template_type(data)
+    cache_key = pdf_cache_key(data, template_type)
+    pdf_file, _ = get_or_render_pdf(data, cache_key)
+    
+    if isinstance(pdf_file, io.BytesIO):
+        return pdf_file.getvalue(), DOWNLOAD_NAMES[template_type]
+    return pdf_file, DOWNLOAD_NAMES[template_type]
+
+def generate_pdf_bytes(data):
+    """Render a payload through the PDF cache, returning the PDF bytes and download name"""
+    pdf_file, download_name = generate_pdf_file(data)
+    if isinstance(pdf_file, bytes):
+        return pdf_file, download_name
+    with open(pdf_file, 'rb') as f:
+        return f.read(), download_name
+
+# Finished jobs keep the cached PDF's path rather than its bytes, so waiting results cost no memory
+job_queue = JobQueue(
+    generate_pdf_file,
+    workers=int(os.environ.get('PDF_JOB_WORKERS', 2)),
+    max_pending=int(os.environ.get('PDF_JOB_MAX_PENDING', 32)),
+    max_results=int(os.environ.get('PDF_JOB_MAX_RESULTS', 256)),
+)
+
+def job_urls(job):
+    return {
+        'status_url': f'/api/jobs/{job.id}',
+        'result_url': f'/api/jobs/{job.id}/result',
+    }
+
+@app.route('/api/jobs', methods=['POST'])
+def create_job():
+    """Queue a PDF generation and return its job id immediately"""
+    data = request.json or {}
+    if not isinstance(data, dict):
+        return jsonify({'error': 'request body must be a payload object'}), 400
+    
+    # Previews jump the queue; otherwise smaller payloads go first
+    priority = (0 if data.get('preview') else 1, request.content_length or 0)
+    
+    try:
+        job = job_queue.submit(data, priority)
+    except QueueFull as e:
+        response = jsonify({'error': f"Too many pending jobs: {str(e)}"})
+        response.status_code = 429
+        response.headers['Retry-After'] = '5'
+        return response
+    except QueueClosed as e:
+        return jsonify({'error': str(e)}), 503
+    
+    return jsonify({**job.to_dict(), **job_urls(job)}), 202
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    """Report the status of a queued PDF generation"""
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    return jsonify({**job.to_dict(), **job_urls(job), 'queue_depth': job_queue.depth()})
+
+@app.route('/api/jobs/<job_id>/result', methods=['GET'])
+def job_result(job_id):
+    """Return the PDF of a finished job"""
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    if job.status == 'failed':
+        return jsonify({'error': f"PDF generation failed: {job.error}"}), 500
+    if job.status != 'done':
+        return jsonify(job.to_dict()), 202
+    
+    if isinstance(job.result, bytes):
+        pdf_file = io.BytesIO(job.result)
+    else:
+        try:
+            pdf_file = open(job.result, 'rb')
+        except FileNotFoundError:
+            # The PDF cache evicted the result before it was collected
+            return jsonify({'error': 'Job result expired'}), 410
+    return send_file(pdf_file, mimetype='application/pdf', as_attachment=True,
+                     download_name=job.download_name)
+
+BATCH_MAX_ITEMS = int(os.environ.get('BATCH_MAX_ITEMS', 100))
+batch_executor = ThreadPoolExecutor(max_workers=int(os.environ.get('BATCH_CONCURRENCY', 4)))
+
+def batch_item_label(index, data):
+    """Name a batch item for bookmarks and error reports"""
+    if data.get('title'):
+        return data['title']
+    return f"{data.get('city_name', 'Agenda')} {data.get('meeting_type', '')} {data.get('meeting_date', '')}".strip()
+
+# Template types rendered through LibreOffice, which can share one conversion run in a batch
+DOCX_TEMPLATE_TYPES = ('sausalito-agenda', 'dublin-word')
+BATCH_CONVERT_SIZE = int(os.environ.get('SOFFICE_BATCH_MAX', 8))
+
+def render_docx(data):
+    """Render a Word-based payload to an in-memory DOCX"""
+    template_type = resolve_template_type(data)
+    with track_render(template_type, payload_size_class(data)):
+        if template_type == 'dublin-word':
+            return generate_dublin_word_document(data)
+        return generate_word_document(data)
+
+def read_cached_pdf(data, pdf_file, template_type):
+    """Return a cached PDF's bytes and download name, rendering again if it was evicted meanwhile"""
+    try:
+        with open(pdf_file, 'rb') as f:
+            return f.read(), DOWNLOAD_NAMES[template_type]
+    except FileNotFoundError:
+        return generate_pdf_bytes(data)
+
+def render_batch(items):
+    """Render batch items concurrently, yielding (index, pdf bytes, download name, error) as each finishes
+    
+    Word-based items that miss the PDF cache are rendered to DOCX first and then
+    converted together, so LibreOffice startup is paid once per chunk of documents.
+    """
+    cache = get_pdf_cache()
+    pdf_futures = {}
+    docx_futures = {}
+    failures = []
+    for index, data in enumerate(items):
+        try:
+            template_type = resolve_template_type(data)
+            cache_key = pdf_cache_key(data, template_type)
+            # Only Word items are looked up here, as their misses skip the render path that
+            # counts lookups; everything else records its own in generate_pdf_bytes
+            pdf_file = cache.get(cache_key) if template_type in DOCX_TEMPLATE_TYPES else None
+        except Exception as e:
+            # One malformed item is reported in its slot instead of failing the whole batch
+            failures.append((index, str(e)))
+            continue
+        if template_type not in DOCX_TEMPLATE_TYPES:
+            pdf_futures[batch_executor.submit(generate_pdf_bytes, data)] = index
+        elif pdf_file is None:
+            docx_futures[batch_executor.submit(render_docx, data)] = (index, cache_key, template_type)
+        else:
+            pdf_futures[batch_executor.submit(read_cached_pdf, data, pdf_file, template_type)] = index
+    
+    for index, error in failures:
+        yield index, None, None, error
+    
+    for future in as_completed(pdf_futures):
+        index = pdf_futures[future]
+        try:
+            pdf_bytes, download_name = future.result()
+            yield index, pdf_bytes, download_name, None
+        except Exception as e:
+            yield index, None, None, str(e)
+    
+    rendered = []
+    for future, (index, cache_key, template_type) in docx_futures.items():
+        try:
+            rendered.append((index, cache_key, template_type, future.result()))
+        except Exception as e:
+            yield index, None, None, str(e)
+    
+    chunks = [rendered[i:i + BATCH_CONVERT_SIZE] for i in range(0, len(rendered), BATCH_CONVERT_SIZE)]
+    conversions = {batch_executor.submit(convert_to_pdf_batch, [docx for *_, docx in chunk]): chunk
+                   for chunk in chunks}
+    for future in as_completed(conversions):
+        for (index, cache_key, template_type, _), (pdf_buffer, error) in zip(conversions[future], future.result()):
+            if error:
+                yield index, None, None, error
+                continue
+            cache.put(cache_key, pdf_buffer.getvalue())
+            yield index, pdf_buffer.getvalue(), DOWNLOAD_NAMES[template_type], None
+
+@app.route('/api/generate-batch', methods=['POST'])
+def generate_batch():
+    """Render many agendas in one call as a streamed ZIP or a single bookmarked PDF"""
+    data = request.json or {}
+    items = data.get('items', [])
+    output_format = data.get('format', 'zip')
+    
+    if not isinstance(items, list) or not items:
+        return jsonify({'error': 'items must be a non-empty list of payloads'}), 400
+    if len(items) > BATCH_MAX_ITEMS:
+        return jsonify({'error': f"Batch limited to {BATCH_MAX_ITEMS} items"}), 400
+    if not all(isinstance(item, dict) for item in items):
+        return jsonify({'error': 'each batch item must be a payload object'}), 400
+    if output_format not in ('zip', 'pdf'):
+        return jsonify({'error': "format must be 'zip' or 'pdf'"}), 400
+    
+    if output_format == 'pdf':
+        parts = []
+        failures = []
+        for index, pdf_bytes, _, error in render_batch(items):
+            if error:
+                failures.append((index, error))
+            else:
+                parts.append((index, batch_item_label(index, items[index]), pdf_bytes))
+        
+        try:
+            merged, merge_failures = merge_pdfs(sorted(parts))
+        except ImportError as e:
+            return jsonify({'error': str(e)}), 501
+        
+        errors = [{'index': index, 'label': batch_item_label(index, items[index]), 'error': error}
+                  for index, error in sorted(failures + merge_failures)]
+        if len(errors) == len(items):
+            return jsonify({'error': 'Every batch item failed', 'errors': errors}), 500
+        
+        response = send_file(merged, mimetype='application/pdf', as_attachment=True,
+                             download_name='agendas.pdf')
+        response.headers['X-Batch-Errors'] = json.dumps(errors)
+        return response
+    
+    def entries():
+        # Items are added to the archive in completion order, with a manifest at the end
+        manifest = []
+        for index, pdf_bytes, download_name, error in render_batch(items):
+            entry = {'index': index, 'label': batch_item_label(index, items[index])}
+            if error:
+                entry['error'] = error
+            else:
+                entry['filename'] = f"{index + 1:03d}_{download_name}"
+                yield entry['filename'], pdf_bytes
+            manifest.append(entry)
+        yield 'manifest.json', json.dumps(sorted(manifest, key=lambda e: e['index']), indent=2)
+    
+    response = app.response_class(stream_with_context(stream_zip(entries())), mimetype='application/zip')
+    response.headers['Content-Disposition'] = 'attachment; filename=agendas.zip'
+    return response
+
+PREVIEW_SESSION_TTL = int(os.environ.get('PREVIEW_SESSION_TTL', 1800))
+PREVIEW_MAX_SESSIONS = int(os.environ.get('PREVIEW_MAX_SESSIONS', 500))
+sessions_lock = threading.Lock()
+
+def fragment_key(value):
+    """Stable hash of a JSON-serialisable value"""
+    return hashlib.sha1(json.dumps(value, sort_keys=True, separators=(',', ':')).encode('utf-8')).hexdigest()
+
+def get_preview_session(session_id):
+    """Fetch or create the render state for an editor session, expiring idle ones"""
+    now = time.time()
+    with sessions_lock:
+        for stale_id in [sid for sid, state in sessions.items() if now - state['last_used'] > PREVIEW_SESSION_TTL]:
+            del sessions[stale_id]
+        
+        if not session_id or session_id not in sessions:
+            if len(sessions) >= PREVIEW_MAX_SESSIONS:
+                del sessions[min(sessions, key=lambda sid: sessions[sid]['last_used'])]
+            session_id = session_id or uuid.uuid4().hex
+            sessions[session_id] = new_preview_state()
+        
+        state = sessions[session_id]
+        state['last_used'] = now
+    return session_id, state
+
+def new_preview_state():
+    return {'header': None, 'fragments': {}, 'last_used': time.time(), 'lock': threading.Lock()}
+
+def render_agenda_preview(state, template_data, header_template='agenda-preview-header.html', header_context=None):
+    """Render agenda HTML, re-rendering only the header and sections that changed since the last call"""
+    with state['lock']:
+        if header_context is None:
+            header_context = build_agenda_context(template_data)
+        header_key = fragment_key([header_template, header_context])
+        if state['header'] is None or state['header'][0] != header_key:
+            state['header'] = (header_key, html_templates.get_template(header_template).render(**header_context).strip())
+        
+        section_template = html_templates.get_template('agenda-preview-section.html')
+        fragments = {}
+        changed = []
+        parts = [state['header'][1]]
+        for index, section in enumerate(template_data.get('agenda_sections', [])):
+            key = fragment_key(section)
+            html = fragments.get(key) or state['fragments'].get(key)
+            if html is None:
+                html = section_template.render(section=section).strip()
+                changed.append(index)
+            fragments[key] = html
+            parts.append(html)
+        
+        # Keep only fragments for sections still in the agenda
+        state['fragments'] = fragments
+        
+        return {
+            'html': '\n'.join(parts),
+            'changed_sections': changed,
+            'reused_sections': len(parts) - 1 - len(changed),
+        }
+
+@app.route('/api/preview-sections', methods=['POST'])
+def preview_sections():
+    """Incremental agenda preview: only sections edited since the session's last call are re-rendered"""
+    try:
+        data = request.json or {}
+        session_id, state = get_preview_session(data.get('session_id'))
+        result = render_agenda_preview(state, data)
+        return jsonify({'session_id': session_id, **result})
+    except Exception as e:
+        return jsonify({'error': f"Preview failed: {str(e)}"}), 500
+
+def stylesheet_url(name):
+    return f'/api/stylesheets/{name}.css'
+
+def render_preview_html(data):
+    """Render HTML for a payload without converting it to PDF"""
+    template_type = resolve_template_type(data)
+    
+    if template_type == 'dublin-agenda':
+        # The Dublin HTML template carries its own styles
+        return generate_dublin_html_document(data), None
+    
+    elif template_type == 'dublin-tiptap':
+        html_content = generate_dublin_tiptap_document(data)
+        return html_content.replace('</head>', f'<link rel="stylesheet" href="{stylesheet_url("dublin-tiptap")}">\n</head>', 1), None
+    
+    elif template_type == 'sausalito-word':
+        html_content = generate_sausalito_word_document(data)
+        return html_content.replace('</head>', f'<link rel="stylesheet" href="{stylesheet_url("sausalito-word")}">\n</head>', 1), None
+    
+    # Word-based templates get an HTML approximation built from the same context,
+    # reusing the editor session's section fragments when a session id is given
+    session_id = data.get('session_id')
+    if session_id:
+        session_id, state = get_preview_session(session_id)
+    else:
+        state = new_preview_state()
+    
+    if template_type == 'dublin-word':
+        preview = render_agenda_preview(state, data, 'dublin-word-preview-header.html',
+                                        {'meeting_date': data.get('meeting_date', 'Date TBD')})
+        title = 'Dublin City Council Agenda'
+    else:
+        preview = render_agenda_preview(state, data)
+        title = f"{data.get('city_name', 'City Name')} Agenda"
+    
+    html_content = html_templates.get_template('agenda-preview.html').render(
+        title=title,
+        stylesheets=[stylesheet_url('agenda-preview')],
+        body_class='agenda-preview',
+        body=preview['html'],
+    )
+    return html_content, session_id
+
+@app.route('/api/preview-html', methods=['POST'])
+def preview_html():
+    """Fast preview: return the rendered HTML and skip PDF conversion entirely"""
+    try:
+        html_content, session_id = render_preview_html(request.json or {})
+        response = app.response_class(html_content, mimetype='text/html')
+        if session_id:
+            response.headers['X-Preview-Session'] = session_id
+        return response
+    except Exception as e:
+        return f"Preview failed: {str(e)}", 500
+
+@app.route('/api/stylesheets/<name>.css', methods=['GET'])
+def stylesheet(name):
+    """Serve preview stylesheets as cacheable static assets"""
+    spec = STYLESHEETS.get(name)
+    if spec is None:
+        return "Stylesheet not found", 404
+    
+    if spec[0] == 'file':
+        _, path, fallback = spec
+        try:
+            css = template_registry.get_file(path)
+        except FileNotFoundError:
+            css = fallback.encode('utf-8')
+    else:
+        css = spec[1].encode('utf-8')
+    
+    response = app.response_class(css, mimetype='text/css')
+    response.set_etag(hashlib.sha1(css).hexdigest())
+    response.cache_control.public = True
+    response.cache_control.max_age = 3600
+    return response.make_conditional(request)
+
+@app.route('/api/cache-stats', methods=['GET'])
+def cache_stats():
+    """Report PDF cache hit/miss counters"""
+    return jsonify(get_pdf_cache().stats())
+
+@app.route('/api/template-stats', methods=['GET'])
+def template_stats():
+    """Report template cache hit rate and resident size, and the tenant templates found"""
+    return jsonify({'registry': template_registry.stats(), 'catalog': template_catalog.stats()})
+
+@app.route('/api/logos', methods=['GET'])
+def list_logos():
+    """List the city logos a payload can select with its "logo" key"""
+    return jsonify(logo_registry.stats())
+
+# Server-Timing headers are sent for every request when SERVER_TIMING is set,
+# otherwise only for requests that ask with ?timing=1
+SERVER_TIMING = os.environ.get('SERVER_TIMING', '').lower() in ('1', 'true', 'yes')
+
+@app.before_request
+def start_request_trace():
+    if SERVER_TIMING or request.args.get('timing'):
+        g.trace = begin_trace()
+
+@app.after_request
+def add_server_timing(response):
+    trace = g.get('trace')
+    if trace is not None:
+        response.headers['Server-Timing'] = trace.server_timing()
+    return response
+
+@app.teardown_request
+def finish_request_trace(exception=None):
+    end_trace()
+
+def converter_stats():
+    return get_document_converter().stats()
+
+def temp_filesystem_usage():
+    usage = shutil.disk_usage(tempfile.gettempdir())
+    return [({'kind': 'used'}, usage.used), ({'kind': 'free'}, usage.free)]
+
+metrics_registry.collect('pdf_job_queue_depth', 'Jobs waiting for a worker', job_queue.depth)
+metrics_registry.collect('pdf_jobs_running', 'Jobs currently being rendered', job_queue.running)
+metrics_registry.collect('soffice_pool_workers', 'LibreOffice workers in the pool',
+                         lambda: converter_stats()['size'])
+metrics_registry.collect('soffice_pool_busy_workers', 'LibreOffice workers converting right now',
+                         lambda: converter_stats()['busy'])
+metrics_registry.collect('soffice_pool_utilization', 'Fraction of LibreOffice workers that are busy',
+                         lambda: converter_stats()['busy'] / max(converter_stats()['size'], 1))
+metrics_registry.collect('soffice_jobs_total', 'Conversions handled by the pool',
+                         lambda: converter_stats()['jobs'], kind='counter')
+metrics_registry.collect('soffice_failures_total', 'Conversions that failed or timed out',
+                         lambda: converter_stats()['failures'], kind='counter')
+metrics_registry.collect('soffice_restarts_total', 'LibreOffice worker restarts',
+                         lambda: converter_stats()['restarts'], kind='counter')
+metrics_registry.collect('soffice_pool_mode', 'Conversion mode of the LibreOffice pool (uno or subprocess)',
+                         lambda: [({'mode': converter_stats()['mode']}, 1)])
+metrics_registry.collect('pdf_cache_hits_total', 'PDF cache hits',
+                         lambda: get_pdf_cache().stats()['hits'], kind='counter')
+metrics_registry.collect('pdf_cache_misses_total', 'PDF cache misses',
+                         lambda: get_pdf_cache().stats()['misses'], kind='counter')
+metrics_registry.collect('pdf_cache_hit_ratio', 'PDF cache hits over all lookups',
+                         lambda: get_pdf_cache().stats()['hit_rate'])
+metrics_registry.collect('pdf_cache_bytes', 'Bytes of PDFs held in the cache',
+                         lambda: get_pdf_cache().stats()['bytes'])
+metrics_registry.collect('pdf_cache_entries', 'PDFs held in the cache',
+                         lambda: get_pdf_cache().stats()['entries'])
+metrics_registry.collect('temp_filesystem_bytes', 'Used and free bytes of the whole filesystem holding the conversion temp directory',
+                         temp_filesystem_usage)
+metrics_registry.collect('pdf_renders_in_flight', 'Distinct PDF renders running right now',
+                         pdf_flights.in_flight)
+metrics_registry.collect('pdf_coalesced_requests_total', 'Requests that waited on an identical render instead of starting one',
+                         lambda: pdf_flights.stats()['coalesced'], kind='counter')
+metrics_registry.collect('template_cache_bytes', 'Bytes of parsed templates, assets and prepared documents held',
+                         lambda: template_registry.stats()['resident_bytes'])
+metrics_registry.collect('template_cache_hit_ratio', 'Template cache hits over all lookups',
+                         lambda: template_registry.stats()['hit_rate'])
+metrics_registry.collect('template_cache_evictions_total', 'Templates evicted to stay under the byte cap',
+                         lambda: template_registry.stats()['evictions'], kind='counter')
+metrics_registry.collect('preview_sessions', 'Live incremental preview sessions', lambda: len(sessions))
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Expose pipeline timings and component gauges in the Prometheus text format"""
+    return app.response_class(metrics_registry.render(), mimetype='text/plain; version=0.0.4')
+
+# Readiness: green once the converters are warm, red again while draining for shutdown
+readiness = {'warm': False, 'draining': False, 'error': None}
+active_requests = 0
+active_requests_done = threading.Condition()
+
+@app.before_request
+def count_active_request():
+    global active_requests
+    with active_requests_done:
+        active_requests += 1
+
+@app.teardown_request
+def release_active_request(exception=None):
+    global active_requests
+    with active_requests_done:
+        active_requests -= 1
+        active_requests_done.notify_all()
+
+WARM_UP_MAX_DELAY = float(os.environ.get('WARM_UP_MAX_DELAY', 60))
+
+def warm_up():
+    """Start the LibreOffice and WeasyPrint workers so the first request does not pay for them
+    
+    Both must complete a check render before the server reports ready; failures are
+    retried with exponential backoff until they succeed or the server starts draining.
+    """
+    delay = 1.0
+    while not readiness['draining']:
+        try:
+            get_converter_pool().warm()
+            get_html_renderer().warm()
+            readiness['warm'] = True
+            readiness['error'] = None
+            return
+        except Exception as e:
+            readiness['error'] = str(e)
+            print(f"Converter warm-up failed, retrying in {delay:.0f}s: {e}")
+        time.sleep(delay)
+        delay = min(delay * 2, WARM_UP_MAX_DELAY)
+
+def drain(timeout=30):
+    """Stop taking work, wait for in-flight requests and queued jobs, then stop the converters"""
+    readiness['draining'] = True
+    deadline = time.monotonic() + timeout
+    
+    with active_requests_done:
+        while active_requests > 0 and time.monotonic() < deadline:
+            active_requests_done.wait(deadline - time.monotonic())
+        if active_requests > 0:
+            print(f"Shutting down with {active_requests} requests still in flight")
+    
+    job_queue.close()
+    if not job_queue.drain(max(deadline - time.monotonic(), 0)):
+        print(f"Shutting down with {job_queue.depth()} PDF jobs still queued")
+    batch_executor.shutdown(wait=False, cancel_futures=True)
+    
+    get_converter_pool().shutdown()
+    get_html_renderer().shutdown()
+
+@app.route('/api/ready', methods=['GET'])
+def ready():
+    """Readiness probe: 200 once converters are warm, 503 before that and while draining"""
+    is_ready = readiness['warm'] and not readiness['draining']
+    return jsonify({'ready': is_ready, 'converter_mode': get_converter_pool().mode, **readiness}), \
+        200 if is_ready else 503
+
 if __name__ == '__main__':
     # Get port from environment variable or default to 8000
     port = int(os.environ.get('FLASK_PORT', 8000))
@@ -801,4 +1684,6 @@ if __name__ == '__main__':
         print("🔗 Frontend will connect automatically")
     print("=" * 50)
     
-    app.run(debug=True, host='0.0.0.0', port=port) 
\ No newline at end of file
+    # Development server; use serve.py for production
+    debug = os.environ.get('FLASK_DEBUG', '1').lower() in ('1', 'true', 'yes')
+    app.run(debug=debug, host='0.0.0.0', port=port) 
\ No newline at end of file
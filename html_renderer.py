@@ -0,0 +1,175 @@
+"""
+Process pool for CPU-bound WeasyPrint HTML -> PDF rendering
+"""
+
+import multiprocessing
+import os
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+WARMUP_HTML = '<html><body><p style="font-family: \'Times New Roman\', serif">Warm up</p></body></html>'
+
+
+# Per-process WeasyPrint state, built once in each worker
+_font_config = None
+_stylesheets = {}  # cache key -> (file stamp, weasyprint.CSS)
+
+
+def css_file(path, fallback=None):
+    """Describe a stylesheet read from disk, reloaded when the file changes"""
+    return ('file', path, fallback)
+
+
+def css_string(text):
+    """Describe a stylesheet given as CSS source"""
+    return ('string', text)
+
+
+def _get_font_config():
+    global _font_config
+    if _font_config is None:
+        from weasyprint.text.fonts import FontConfiguration
+        _font_config = FontConfiguration()
+    return _font_config
+
+
+def _load_stylesheet(spec):
+    """Return a parsed weasyprint.CSS for a stylesheet spec, parsing each source once"""
+    import weasyprint
+
+    if spec[0] == 'file':
+        _, path, fallback = spec
+        try:
+            stamp = os.stat(path).st_mtime_ns
+        except FileNotFoundError:
+            if fallback is None:
+                raise
+            return _load_stylesheet(css_string(fallback))
+
+        cached = _stylesheets.get(spec)
+        if cached and cached[0] == stamp:
+            return cached[1]
+        css = weasyprint.CSS(filename=path, font_config=_get_font_config())
+    else:
+        stamp = None
+        cached = _stylesheets.get(spec)
+        if cached:
+            return cached[1]
+        css = weasyprint.CSS(string=spec[1], font_config=_get_font_config())
+
+    _stylesheets[spec] = (stamp, css)
+    return css
+
+
+def _warm_worker(stylesheets=()):
+    """Import WeasyPrint, load fonts and parse known stylesheets before the first job"""
+    try:
+        import weasyprint
+        for spec in stylesheets:
+            _load_stylesheet(spec)
+        weasyprint.HTML(string=WARMUP_HTML).write_pdf(font_config=_get_font_config())
+    except Exception as e:
+        # Leave the worker alive; HTMLRenderer.warm and render_html_to_pdf surface the real error
+        print(f"WeasyPrint worker warm-up failed: {e}")
+
+
+def _check_worker():
+    """Render a tiny document, raising if WeasyPrint cannot work in this process"""
+    import weasyprint
+    weasyprint.HTML(string=WARMUP_HTML).write_pdf(font_config=_get_font_config())
+    return os.getpid()
+
+
+def render_html_to_pdf(html_content, stylesheets=()):
+    """Render HTML to PDF bytes with cached stylesheets; runs inside a pool worker"""
+    # Import weasyprint inside function to avoid pango errors
+    import weasyprint
+    return weasyprint.HTML(string=html_content).write_pdf(
+        stylesheets=[_load_stylesheet(spec) for spec in stylesheets],
+        font_config=_get_font_config())
+
+
+class HTMLRenderer:
+    """Spreads WeasyPrint layout across processes so it is not bound by the GIL"""
+
+    def __init__(self, size=None, max_tasks_per_worker=100):
+        self.size = size if size is not None else (os.cpu_count() or 1)
+        self.max_tasks_per_worker = max_tasks_per_worker
+        self._executor = None
+        self._preload = []
+        self._lock = threading.Lock()
+
+    def preload_stylesheets(self, stylesheets):
+        """Have workers parse these stylesheets while warming up"""
+        self._preload.extend(stylesheets)
+
+    def _create_executor(self):
+        # Forking a threaded server is unsafe; workers are warmed by _warm_worker instead
+        method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+        context = multiprocessing.get_context(method)
+
+        options = {}
+        if sys.version_info >= (3, 11):
+            # Recycle workers to cap memory growth from long-lived layout caches
+            options['max_tasks_per_child'] = self.max_tasks_per_worker
+
+        return ProcessPoolExecutor(max_workers=self.size, mp_context=context,
+                                   initializer=_warm_worker, initargs=(tuple(self._preload),),
+                                   **options)
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = self._create_executor()
+            return self._executor
+
+    def warm(self):
+        """Start every worker process now and check that each one can render"""
+        if self.size <= 0:
+            _check_worker()
+            return
+        executor = self._get_executor()
+        for future in [executor.submit(_check_worker) for _ in range(self.size)]:
+            future.result()
+
+    def render(self, html_content, stylesheets=()):
+        """Render HTML to PDF bytes on the next free worker"""
+        stylesheets = tuple(stylesheets)
+        if self.size <= 0:
+            return render_html_to_pdf(html_content, stylesheets)
+
+        executor = self._get_executor()
+        try:
+            return executor.submit(render_html_to_pdf, html_content, stylesheets).result()
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for memory); replace the pool and retry once
+            with self._lock:
+                if self._executor is executor:
+                    self._executor = None
+            executor.shutdown(wait=False, cancel_futures=True)
+            return self._get_executor().submit(render_html_to_pdf, html_content, stylesheets).result()
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+_renderer = None
+_renderer_lock = threading.Lock()
+
+
+def get_html_renderer():
+    """Return the process-wide WeasyPrint pool, configured from the environment"""
+    global _renderer
+    with _renderer_lock:
+        if _renderer is None:
+            size = os.environ.get('WEASYPRINT_POOL_SIZE')
+            _renderer = HTMLRenderer(
+                size=int(size) if size is not None else None,
+                max_tasks_per_worker=int(os.environ.get('WEASYPRINT_MAX_TASKS', 100)),
+            )
+        return _renderer
@@ -0,0 +1,148 @@
+"""
+Bounded, prioritised background queue for PDF generation jobs
+"""
+
+import itertools
+import queue
+import threading
+import time
+import uuid
+
+
+class QueueFull(Exception):
+    """Raised when the queue cannot accept more pending jobs"""
+
+
+class QueueClosed(Exception):
+    """Raised when the queue is draining for shutdown"""
+
+
+class Job:
+    """A single queued generation request and its outcome"""
+
+    def __init__(self, payload, priority):
+        self.id = uuid.uuid4().hex
+        self.payload = payload
+        self.priority = priority
+        self.status = 'queued'
+        self.result = None
+        self.download_name = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+
+    def to_dict(self):
+        return {
+            'job_id': self.id,
+            'status': self.status,
+            'error': self.error,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+        }
+
+
+class JobQueue:
+    """Runs jobs on a fixed set of worker threads, lowest priority value first"""
+
+    def __init__(self, handler, workers=2, max_pending=32, result_ttl=600, max_results=256):
+        self.handler = handler
+        self.workers = workers
+        self.max_pending = max_pending
+        self.result_ttl = result_ttl
+        self.max_results = max_results
+        self._queue = queue.PriorityQueue()
+        self._jobs = {}
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        self._threads = []
+        self._running = 0
+        self._closed = False
+
+    def _start_workers(self):
+        # Threads start on first submit so that forking servers get them per worker process
+        if self._threads:
+            return
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f'pdf-job-worker-{i}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, payload, priority=0):
+        """Queue a payload, raising QueueFull when the backlog is at capacity"""
+        with self._lock:
+            if self._closed:
+                raise QueueClosed("Queue is shutting down")
+            self._prune()
+            if self._queue.qsize() >= self.max_pending:
+                raise QueueFull(f"{self.max_pending} jobs already pending")
+
+            job = Job(payload, priority)
+            self._jobs[job.id] = job
+            self._start_workers()
+            # The sequence number keeps equal priorities first-in first-out
+            self._queue.put((priority, next(self._sequence), job))
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            self._prune()
+            return self._jobs.get(job_id)
+
+    def depth(self):
+        """Number of jobs waiting for a worker"""
+        return self._queue.qsize()
+
+    def running(self):
+        """Number of jobs currently being rendered"""
+        with self._lock:
+            return self._running
+
+    def close(self):
+        """Stop accepting jobs; queued and running jobs still finish"""
+        with self._lock:
+            self._closed = True
+
+    def drain(self, timeout=None):
+        """Wait for queued and running jobs to finish, returning False if the timeout passed first"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def _prune(self):
+        """Forget finished jobs whose results have not been collected in time, and the
+        oldest finished jobs beyond max_results
+        """
+        # Caller holds the lock
+        now = time.time()
+        finished = sorted((job.finished_at, job_id) for job_id, job in self._jobs.items() if job.finished_at)
+        excess = max(len(finished) - self.max_results, 0)
+        for index, (finished_at, job_id) in enumerate(finished):
+            if index < excess or now - finished_at > self.result_ttl:
+                del self._jobs[job_id]
+
+    def _work(self):
+        while True:
+            _, _, job = self._queue.get()
+            with self._lock:
+                self._running += 1
+            job.status = 'running'
+            job.started_at = time.time()
+            try:
+                job.result, job.download_name = self.handler(job.payload)
+                job.status = 'done'
+            except Exception as e:
+                job.error = str(e)
+                job.status = 'failed'
+            finally:
+                job.finished_at = time.time()
+                job.payload = None
+                with self._lock:
+                    self._running -= 1
+                self._queue.task_done()
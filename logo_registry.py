@@ -0,0 +1,121 @@
+"""
+In-memory registry of city logos: image bytes, digests, dimensions and pre-scaled variants
+"""
+
+import io
+import math
+import os
+import threading
+
+from docx.image.image import Image as DocxImage
+
+try:
+    from PIL import Image as PILImage
+except ImportError:
+    PILImage = None
+
+LOGO_EXTENSIONS = ('.jpeg', '.jpg', '.png', '.gif', '.bmp', '.tif', '.tiff')
+
+# Pillow format name to save variants in, by content type; other formats are not rescaled
+VARIANT_FORMATS = {'image/jpeg': 'JPEG', 'image/png': 'PNG'}
+
+
+class LogoAsset:
+    """One logo image with its SHA1, pixel size and downscaled copies keyed by pixel width"""
+
+    def __init__(self, name, path, data):
+        # The same header probe python-docx runs when the image is embedded
+        image = DocxImage.from_blob(data)
+        self.name = name
+        self.path = path
+        self.data = data
+        self.sha1 = image.sha1
+        self.content_type = image.content_type
+        self.width_px = image.px_width
+        self.height_px = image.px_height
+        self.dpi = (image.horz_dpi, image.vert_dpi)
+        self.variants = {}  # pixel width -> image bytes
+
+    def add_variant(self, width_px):
+        """Store a copy scaled down to width_px, if that is smaller than the original"""
+        image_format = VARIANT_FORMATS.get(self.content_type)
+        if PILImage is None or image_format is None or width_px >= self.width_px:
+            return
+
+        height_px = max(1, round(self.height_px * width_px / self.width_px))
+        with PILImage.open(io.BytesIO(self.data)) as source:
+            scaled = source.resize((width_px, height_px), PILImage.LANCZOS)
+            output = io.BytesIO()
+            options = {'quality': 90} if image_format == 'JPEG' else {'optimize': True}
+            scaled.save(output, format=image_format, **options)
+        self.variants[width_px] = output.getvalue()
+
+    def image_for(self, width, dpi=300):
+        """Return the smallest stored image still sharp at the given display width (a docx Length)"""
+        needed = math.ceil(width.inches * dpi)
+        fits = [px for px in self.variants if px >= needed]
+        return self.variants[min(fits)] if fits else self.data
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'sha1': self.sha1,
+            'content_type': self.content_type,
+            'width_px': self.width_px,
+            'height_px': self.height_px,
+            'bytes': len(self.data),
+            'variants': {px: len(data) for px, data in sorted(self.variants.items())},
+        }
+
+
+class LogoRegistry:
+    """Logos found in an assets directory, loaded once and looked up by name"""
+
+    def __init__(self):
+        self.dpi = 300
+        self._logos = {}  # name -> LogoAsset
+        self._lock = threading.Lock()
+
+    def load(self, directory, display_widths=(), dpi=300):
+        """Read every logo in directory, named by file stem, with variants for each display width"""
+        logos = {}
+        try:
+            filenames = sorted(os.listdir(directory))
+        except FileNotFoundError:
+            print(f"Logo directory {directory} not found; no logos loaded")
+            filenames = []
+
+        for filename in filenames:
+            stem, extension = os.path.splitext(filename)
+            if extension.lower() not in LOGO_EXTENSIONS:
+                continue
+            path = os.path.join(directory, filename)
+            try:
+                with open(path, 'rb') as f:
+                    logo = LogoAsset(stem.lower(), path, f.read())
+                for width in display_widths:
+                    logo.add_variant(math.ceil(width.inches * dpi))
+            except Exception as e:
+                # One unreadable file should not keep the other cities' logos from loading
+                print(f"Loading logo {path} failed: {e!r}")
+                continue
+            logos[logo.name] = logo
+
+        with self._lock:
+            self._logos = logos
+            self.dpi = dpi
+        return logos
+
+    def get(self, name):
+        with self._lock:
+            logo = self._logos.get(str(name).lower())
+        if logo is None:
+            raise FileNotFoundError(name)
+        return logo
+
+    def stats(self):
+        with self._lock:
+            return {name: logo.to_dict() for name, logo in sorted(self._logos.items())}
+
+
+logo_registry = LogoRegistry()
@@ -0,0 +1,260 @@
+"""
+Timing spans, counters and Prometheus text exposition for the PDF pipeline
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic count per label set"""
+
+    kind = 'counter'
+
+    def __init__(self, name, help_text, label_names=()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(label_names)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.label_names)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for key, value in sorted(values.items()):
+            yield self.name, list(zip(self.label_names, key)), value
+
+
+class Histogram:
+    """Cumulative bucket counts, sum and count per label set"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, label_names=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+        self._values = {}  # label values -> [bucket counts, sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.label_names)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][index] += 1
+                    break
+            entry[1] += value
+            entry[2] += 1
+
+    def samples(self):
+        with self._lock:
+            values = {key: (list(counts), total, count) for key, (counts, total, count) in self._values.items()}
+        for key, (counts, total, count) in sorted(values.items()):
+            labels = list(zip(self.label_names, key))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                yield f'{self.name}_bucket', labels + [('le', _format_value(bound))], cumulative
+            yield f'{self.name}_sum', labels, total
+            yield f'{self.name}_count', labels, count
+
+
+class CallbackMetric:
+    """Value read from a callback at scrape time, for state owned by other components
+
+    The callback returns a number, or a list of (labels dict, number) pairs.
+    """
+
+    def __init__(self, name, help_text, callback, kind='gauge'):
+        self.name = name
+        self.help = help_text
+        self.callback = callback
+        self.kind = kind
+
+    def samples(self):
+        value = self.callback()
+        if isinstance(value, (list, tuple)):
+            for labels, sample in value:
+                yield self.name, sorted(labels.items()), sample
+        elif value is not None:
+            yield self.name, [], value
+
+
+class MetricsRegistry:
+    """Holds every metric and renders them in the Prometheus text format"""
+
+    def __init__(self):
+        self._metrics = []
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, help_text, label_names=()):
+        return self._register(Counter(name, help_text, label_names))
+
+    def histogram(self, name, help_text, label_names=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, help_text, label_names, buckets))
+
+    def collect(self, name, help_text, callback, kind='gauge'):
+        """Register a gauge (or a counter kept elsewhere) read through a callback"""
+        return self._register(CallbackMetric(name, help_text, callback, kind))
+
+    def render(self):
+        lines = []
+        with self._lock:
+            metrics = list(self._metrics)
+        for metric in metrics:
+            try:
+                samples = list(metric.samples())
+            except Exception as e:
+                # One broken collector should not take down the whole scrape
+                print(f"Collecting metric {metric.name} failed: {e}")
+                continue
+            lines.append(f'# HELP {metric.name} {metric.help}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            for name, labels, value in samples:
+                lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+stage_seconds = registry.histogram(
+    'pdf_stage_duration_seconds', 'Time spent in each PDF generation stage',
+    ('stage', 'template', 'size'))
+stage_failures = registry.counter(
+    'pdf_stage_failures_total', 'PDF generation stages that raised an error',
+    ('stage', 'template'))
+render_seconds = registry.histogram(
+    'pdf_render_duration_seconds', 'End-to-end time to render one document',
+    ('template', 'size'))
+renders = registry.counter(
+    'pdf_renders_total', 'Documents rendered, by outcome',
+    ('template', 'outcome'))
+
+
+def size_class(count):
+    """Bucket a payload size (items, blocks or kilobytes) into a low-cardinality label"""
+    for bound in (10, 100, 1000):
+        if count <= bound:
+            return f'le{bound}'
+    return 'gt1000'
+
+
+# Labels and Server-Timing entries for the render running on this thread
+_current = threading.local()
+
+
+class Trace:
+    """Stage timings collected for one request, rendered as a Server-Timing header"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.entries = []  # (stage, seconds)
+
+    def add(self, stage, seconds):
+        self.entries.append((stage, seconds))
+
+    def server_timing(self):
+        totals = {}
+        for stage, seconds in self.entries:
+            totals[stage] = totals.get(stage, 0.0) + seconds
+        parts = [f'{stage};dur={seconds * 1000:.1f}' for stage, seconds in totals.items()]
+        parts.append(f'total;dur={(time.perf_counter() - self.started) * 1000:.1f}')
+        return ', '.join(parts)
+
+
+def begin_trace():
+    """Start collecting the spans run on this thread so they can be reported back"""
+    _current.trace = Trace()
+    return _current.trace
+
+
+def end_trace():
+    _current.trace = None
+
+
+@contextmanager
+def labelled(template, size):
+    """Label spans on this thread with the template and size class, unless an outer call already did"""
+    if getattr(_current, 'labels', None) is not None:
+        yield
+        return
+
+    _current.labels = {'template': template, 'size': size}
+    try:
+        yield
+    finally:
+        _current.labels = None
+
+
+@contextmanager
+def track_render(template, size):
+    """Count and time one document render, labelling the spans inside it"""
+    if getattr(_current, 'rendering', False):
+        # Nested call (e.g. render_docx inside render_pdf): the outer render is the one counted
+        yield
+        return
+
+    _current.rendering = True
+    start = time.perf_counter()
+    try:
+        with labelled(template, size):
+            yield
+        renders.inc(template=template, outcome='success')
+    except Exception:
+        renders.inc(template=template, outcome='failure')
+        raise
+    finally:
+        render_seconds.observe(time.perf_counter() - start, template=template, size=size)
+        _current.rendering = False
+
+
+@contextmanager
+def span(stage):
+    """Time one pipeline stage, recording it as a histogram sample and in the request trace"""
+    labels = getattr(_current, 'labels', None) or {'template': 'unknown', 'size': 'unknown'}
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        stage_failures.inc(stage=stage, template=labels['template'])
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        stage_seconds.observe(elapsed, stage=stage, **labels)
+        trace = getattr(_current, 'trace', None)
+        if trace is not None:
+            trace.add(stage, elapsed)
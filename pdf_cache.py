@@ -0,0 +1,220 @@
+"""
+Content-addressed on-disk cache for rendered PDFs
+"""
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+# Bump when a code change alters rendered output for an unchanged payload
+CACHE_VERSION = '3'
+
+KEY_PATTERN = re.compile(r'[0-9a-f]{64}')
+
+
+class FileFingerprints:
+    """Hashes template and asset files, rehashing only when mtime or size change"""
+
+    def __init__(self):
+        self._hashes = {}
+        self._lock = threading.Lock()
+
+    def fingerprint(self, path):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return 'missing'
+
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            cached = self._hashes.get(path)
+            if cached and cached[0] == stamp:
+                return cached[1]
+
+        with open(path, 'rb') as f:
+            digest = hashlib.sha1(f.read()).hexdigest()
+
+        with self._lock:
+            self._hashes[path] = (stamp, digest)
+        return digest
+
+
+def canonicalize_payload(payload):
+    """Serialize a request payload deterministically"""
+    normalized = dict(payload or {})
+    normalized['template'] = normalized.get('template') or 'sausalito-agenda'
+    normalized['font_settings'] = normalized.get('font_settings') or {}
+    return json.dumps(normalized, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+
+
+class PDFCache:
+    """LRU store of rendered PDFs with a byte cap and a time-to-live"""
+
+    def __init__(self, cache_dir, max_bytes=256 * 1024 * 1024, ttl=24 * 3600):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.fingerprints = FileFingerprints()
+        self._entries = OrderedDict()  # key -> (size, stored_at)
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load_index()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f'{key}.pdf')
+
+    def _load_index(self):
+        """Adopt PDFs left by a previous process, oldest first"""
+        found = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.pdf'):
+                continue
+            stat = os.stat(os.path.join(self.cache_dir, name))
+            found.append((stat.st_mtime, name[:-4], stat.st_size))
+
+        for stored_at, key, size in sorted(found):
+            self._entries[key] = (size, stored_at)
+            self._total_bytes += size
+        self._evict()
+
+    def key_for(self, payload, dependencies=(), digests=()):
+        """Hash a payload together with the files and in-memory assets its rendering depends on"""
+        digest = hashlib.sha256()
+        digest.update(CACHE_VERSION.encode())
+        digest.update(canonicalize_payload(payload).encode('utf-8'))
+        for path in dependencies:
+            digest.update(path.encode('utf-8'))
+            digest.update(self.fingerprints.fingerprint(path).encode())
+        for asset_digest in digests:
+            digest.update(asset_digest.encode())
+        return digest.hexdigest()
+
+    def get(self, key, record=True):
+        """Return the cached PDF path for a key, or None on a miss
+
+        Pass record=False for a re-check that should not count as another lookup.
+        """
+        if not KEY_PATTERN.fullmatch(key):
+            return None
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and time.time() - entry[1] > self.ttl:
+                self._remove(key)
+                entry = None
+            elif entry and not os.path.exists(self._path(key)):
+                # Another worker sharing the directory evicted it; forget the stale entry
+                self._remove(key)
+                entry = None
+
+            if entry is None:
+                if record:
+                    self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            if record:
+                self.hits += 1
+            return self._path(key)
+
+    def open(self, key, record=True):
+        """Return the cached PDF opened for reading, or None on a miss
+
+        An open handle stays readable even if another process evicts the file while it is served.
+        """
+        path = self.get(key, record)
+        if path is None:
+            return None
+        try:
+            return open(path, 'rb')
+        except FileNotFoundError:
+            with self._lock:
+                if key in self._entries:
+                    self._remove(key)
+            return None
+
+    def put(self, key, pdf_bytes):
+        """Store a freshly rendered PDF and return its cached path, or None if not cached"""
+        size = len(pdf_bytes)
+        if size > self.max_bytes:
+            return None
+
+        # Write under a unique name first so readers never see a partial file
+        path = self._path(key)
+        fd, partial_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.partial')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(pdf_bytes)
+            os.replace(partial_path, path)
+        except Exception:
+            os.unlink(partial_path)
+            raise
+
+        with self._lock:
+            if key in self._entries:
+                self._total_bytes -= self._entries[key][0]
+            self._entries[key] = (size, time.time())
+            self._entries.move_to_end(key)
+            self._total_bytes += size
+            self._evict()
+        return path
+
+    def _remove(self, key):
+        size, _ = self._entries.pop(key)
+        self._total_bytes -= size
+        try:
+            os.unlink(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def _evict(self):
+        """Drop expired entries, then least recently used ones until under the cap"""
+        now = time.time()
+        for key in [k for k, (_, stored_at) in self._entries.items() if now - stored_at > self.ttl]:
+            self._remove(key)
+            self.evictions += 1
+
+        while self._total_bytes > self.max_bytes and self._entries:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def stats(self):
+        """Report hit/miss counters and store size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self._total_bytes,
+                'max_bytes': self.max_bytes,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_pdf_cache():
+    """Return the process-wide PDF cache, configured from the environment"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = PDFCache(
+                os.environ.get('PDF_CACHE_DIR', os.path.join(tempfile.gettempdir(), 'walfred-pdf-cache')),
+                max_bytes=int(os.environ.get('PDF_CACHE_MAX_BYTES', 256 * 1024 * 1024)),
+                ttl=int(os.environ.get('PDF_CACHE_TTL', 24 * 3600)),
+            )
+        return _cache
@@ -0,0 +1,130 @@
+"""
+Production entry point for the Flask backend
+
+Runs demo_server under gunicorn with preloaded modules, warm converter workers
+and graceful draining on SIGTERM. Without gunicorn (e.g. on Windows) it falls
+back to a threaded werkzeug server with the same warm-up and drain behaviour.
+
+Job status, preview sessions, the PDF cache index and render deduplication live
+in process memory, so the default is one worker process with many threads. With
+WEB_WORKERS > 1 those are per worker (route clients stickily), and the renderer
+pools are split between the workers so the host is not oversubscribed.
+
+Usage: python serve.py
+Environment: FLASK_PORT, WEB_WORKERS, WEB_THREADS, WEB_TIMEOUT, WEB_GRACEFUL_TIMEOUT
+"""
+
+import os
+import signal
+import threading
+
+
+def preload():
+    """Import the app and its heavy dependencies once, before workers fork"""
+    import demo_server
+
+    try:
+        # WeasyPrint pulls in pango/cairo bindings; load them in the master so workers share the pages
+        import weasyprint  # noqa: F401
+    except (ImportError, OSError) as e:
+        print(f"WeasyPrint not preloaded: {e}")
+
+    return demo_server
+
+
+def settings():
+    return {
+        'port': int(os.environ.get('FLASK_PORT', 8000)),
+        'workers': int(os.environ.get('WEB_WORKERS', 1)),
+        'threads': int(os.environ.get('WEB_THREADS', 16)),
+        'timeout': int(os.environ.get('WEB_TIMEOUT', 120)),
+        'graceful_timeout': int(os.environ.get('WEB_GRACEFUL_TIMEOUT', 30)),
+    }
+
+
+def size_pools_per_host(workers):
+    """Split the host's renderer budget between worker processes unless sized explicitly"""
+    if workers <= 1:
+        return
+    print(f"Running {workers} workers: jobs, preview sessions and the PDF cache index are per worker")
+
+    # Each worker starts its own pools, so per-process defaults would multiply by the worker count
+    cpus = os.cpu_count() or 1
+    os.environ.setdefault('WEASYPRINT_POOL_SIZE', str(max(1, cpus // workers)))
+    os.environ.setdefault('SOFFICE_POOL_SIZE', str(max(1, 2 // workers)))
+
+
+def start_warm_up(demo_server):
+    # Warm in the background so the worker starts accepting (and answering /api/ready) at once
+    threading.Thread(target=demo_server.warm_up, name='warm-up', daemon=True).start()
+
+
+def serve_gunicorn(demo_server, config):
+    from gunicorn.app.base import BaseApplication
+
+    def post_fork(server, worker):
+        # Converter pools and job threads are per process, so they start after the fork
+        start_warm_up(demo_server)
+
+    def worker_exit(server, worker):
+        demo_server.drain(timeout=config['graceful_timeout'])
+
+    class WalfredApplication(BaseApplication):
+        def load_config(self):
+            options = {
+                'bind': f"0.0.0.0:{config['port']}",
+                'workers': config['workers'],
+                'threads': config['threads'],
+                'worker_class': 'gthread',
+                'timeout': config['timeout'],
+                'graceful_timeout': config['graceful_timeout'],
+                'preload_app': True,
+                'post_fork': post_fork,
+                'worker_exit': worker_exit,
+            }
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            return demo_server.app
+
+    WalfredApplication().run()
+
+
+def serve_werkzeug(demo_server, config):
+    from werkzeug.serving import make_server
+
+    server = make_server('0.0.0.0', config['port'], demo_server.app, threaded=True)
+
+    def stop(signum, frame):
+        demo_server.readiness['draining'] = True
+        # shutdown() blocks until serve_forever returns, so it cannot run on the main thread
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    start_warm_up(demo_server)
+    print(f"Serving on http://0.0.0.0:{config['port']} (werkzeug, threaded)")
+    server.serve_forever()
+    demo_server.drain(timeout=config['graceful_timeout'])
+
+
+def main():
+    config = settings()
+    # Pools read their sizes from the environment, so this runs before the app is imported
+    size_pools_per_host(config['workers'])
+    demo_server = preload()
+
+    try:
+        import gunicorn  # noqa: F401
+    except ImportError:
+        print("gunicorn not installed; falling back to the threaded werkzeug server")
+        serve_werkzeug(demo_server, config)
+        return
+
+    serve_gunicorn(demo_server, config)
+
+
+if __name__ == '__main__':
+    main()
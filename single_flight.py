@@ -0,0 +1,66 @@
+"""
+Single-flight deduplication: concurrent calls with the same key share one execution
+"""
+
+import threading
+
+
+class _Call:
+    """One in-progress execution and the callers waiting on it"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Runs a function once per key at a time; callers arriving meanwhile get its outcome"""
+
+    def __init__(self):
+        self._calls = {}  # key -> _Call
+        self._lock = threading.Lock()
+        self.executions = 0
+        self.coalesced = 0
+
+    def do(self, key, func):
+        """Return (result, shared), where shared is True when another caller did the work
+
+        An exception raised by the executing caller is raised in every waiter too.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executions += 1
+            else:
+                call.waiters += 1
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = func()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            # Later arrivals start a fresh execution (and usually hit the cache it filled)
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
+
+    def stats(self):
+        with self._lock:
+            return {'in_flight': len(self._calls), 'executions': self.executions, 'coalesced': self.coalesced}
@@ -0,0 +1,287 @@
+"""
+Registry of parsed DOCX templates that hands out cheap per-request clones
+"""
+
+import copy
+import itertools
+import os
+import re
+import threading
+import time
+import zipfile
+from collections import OrderedDict
+
+from docx import Document
+from docx.opc.parts.coreprops import CorePropertiesPart
+from docx.parts.document import DocumentPart
+from docx.parts.hdrftr import FooterPart, HeaderPart
+from docxtpl import DocxTemplate
+
+# Parts that docxtpl rendering or our post-processing modify; every other part
+# (styles, numbering, theme, settings, fonts...) is shared with the pristine copy
+COPIED_PART_TYPES = (DocumentPart, CorePropertiesPart, HeaderPart, FooterPart)
+
+
+def _package_bytes(path):
+    """Uncompressed size of a DOCX package, the unit parsed templates are accounted in"""
+    with zipfile.ZipFile(path) as package:
+        return sum(info.file_size for info in package.infolist())
+
+
+def _copied_bytes(document):
+    """Serialized size of the parts a prepared document holds its own copy of"""
+    return sum(len(part.blob) for part in document.part.package.iter_parts()
+               if isinstance(part, COPIED_PART_TYPES))
+
+
+class TemplateRegistry:
+    """Loads each template on first use, reloads it when the file changes, and
+    keeps templates, asset files and prepared documents in one LRU bounded by bytes
+    """
+
+    def __init__(self, check_interval=1.0, max_bytes=64 * 1024 * 1024):
+        self.check_interval = check_interval
+        self.max_bytes = max_bytes
+        self._templates = {}  # path -> [stamp, checked_at, pristine Document, shared memo, generation, bytes]
+        self._files = {}  # path -> [stamp, checked_at, bytes, size]
+        self._prerendered = {}  # (path, variant) -> [template generation, prepared Document or None, bytes]
+        self._stores = {'template': self._templates, 'file': self._files, 'prerendered': self._prerendered}
+        self._lru = OrderedDict()  # (store, key) -> bytes, least recently used first
+        self._generations = itertools.count(1)
+        self._lock = threading.Lock()
+        self.resident_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _stamp(self, path):
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _touch(self, store, key):
+        # Caller holds the lock
+        self._lru.move_to_end((store, key))
+        self.hits += 1
+
+    def _discard(self, store, key):
+        # Caller holds the lock
+        self._stores[store].pop(key, None)
+        size = self._lru.pop((store, key), None)
+        if size is not None:
+            self.resident_bytes -= size
+
+    def _store(self, store, key, entry, size):
+        """Add an entry, then evict least recently used ones until back under max_bytes"""
+        # Caller holds the lock
+        self._discard(store, key)
+        self._stores[store][key] = entry
+        self._lru[(store, key)] = size
+        self.resident_bytes += size
+
+        # The entry just added always stays, even if it alone is over the cap
+        while self.resident_bytes > self.max_bytes and len(self._lru) > 1:
+            oldest_store, oldest_key = next(iter(self._lru))
+            self._discard(oldest_store, oldest_key)
+            self.evictions += 1
+
+    def _lookup(self, store, path, load):
+        """Return a cached entry, re-statting the file at most once per check_interval"""
+        entries = self._stores[store]
+        now = time.monotonic()
+        with self._lock:
+            entry = entries.get(path)
+            if entry and now - entry[1] < self.check_interval:
+                self._touch(store, path)
+                return entry
+
+        stamp = self._stamp(path)
+        if stamp is None:
+            with self._lock:
+                self._discard(store, path)
+            raise FileNotFoundError(path)
+
+        with self._lock:
+            entry = entries.get(path)
+            if entry and entry[0] == stamp:
+                entry[1] = now
+                self._touch(store, path)
+                return entry
+            self.misses += 1
+
+        entry = [stamp, now] + load(path)
+        with self._lock:
+            self._store(store, path, entry, entry[-1])
+        return entry
+
+    def _load_template(self, path):
+        pristine = Document(path)
+
+        # Pre-seeding deepcopy's memo with the read-only part elements makes
+        # clones share them instead of copying hundreds of KB of styles XML
+        shared = {}
+        for part in pristine.part.package.iter_parts():
+            element = getattr(part, '_element', None)
+            if element is not None and not isinstance(part, COPIED_PART_TYPES):
+                shared[id(element)] = element
+        return [pristine, shared, next(self._generations), _package_bytes(path)]
+
+    def _load_file(self, path):
+        with open(path, 'rb') as f:
+            data = f.read()
+        return [data, len(data)]
+
+    def _clone(self, path):
+        _, _, pristine, shared, generation, _ = self._lookup('template', path, self._load_template)
+        tpl = DocxTemplate(path)
+        tpl.docx = copy.deepcopy(pristine, dict(shared))
+        return tpl, shared, generation
+
+    def preload(self, paths):
+        """Parse templates up front; missing files are skipped"""
+        for path in paths:
+            try:
+                self._lookup('template', path, self._load_template)
+            except FileNotFoundError:
+                pass
+
+    def get_template(self, path):
+        """Return a DocxTemplate backed by a private clone of the parsed template"""
+        return self._clone(path)[0]
+
+    def get_prerendered(self, path, variant, build):
+        """Return a private clone of the template after build(tpl) has run on it
+
+        build renders everything that does not change between requests; its result
+        is kept per hashable variant (e.g. font settings) until the template is reloaded.
+        When build returns False the template cannot be used this way: that decision
+        is kept instead, and None is returned without copying anything.
+        """
+        _, _, _, shared, generation, _ = self._lookup('template', path, self._load_template)
+        key = (path, variant)
+        with self._lock:
+            entry = self._prerendered.get(key)
+            built = entry is not None and entry[0] == generation
+            if built:
+                self._touch('prerendered', key)
+                prepared = entry[1]
+            else:
+                self.misses += 1
+
+        if not built:
+            tpl, shared, generation = self._clone(path)
+            prepared = tpl.docx if build(tpl) is not False else None
+            size = _copied_bytes(prepared) if prepared is not None else 0
+            with self._lock:
+                self._store('prerendered', key, [generation, prepared, size], size)
+
+        if prepared is None:
+            return None
+        # Shared parts were never copied into the prepared document, so the memo still applies
+        return copy.deepcopy(prepared, dict(shared))
+
+    def get_file(self, path):
+        """Return the cached bytes of an asset file"""
+        return self._lookup('file', path, self._load_file)[2]
+
+    def stats(self):
+        """Report hit/miss counters and resident size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'templates': len(self._templates),
+                'files': len(self._files),
+                'prerendered': len(self._prerendered),
+                'resident_bytes': self.resident_bytes,
+                'max_bytes': self.max_bytes,
+            }
+
+
+# Extensions a tenant directory may hold templates in
+TENANT_TEMPLATE_EXTENSIONS = ('.docx', '.html')
+
+# Meeting-type directory a city falls back to when it has none for the requested type
+DEFAULT_MEETING_TYPE = 'default'
+
+
+def slugify(value):
+    """Directory name for a city or meeting type, e.g. 'Regular Meeting' -> 'regular-meeting'"""
+    return re.sub(r'[^a-z0-9]+', '-', str(value).lower()).strip('-')
+
+
+class TemplateCatalog:
+    """Tenant templates found under root/<city>/<meeting type>/<template type>.<ext>
+
+    Only paths are recorded; the registry parses a template the first time it is
+    used. The tree is rescanned at most once per rescan_interval, so a new city's
+    directory is picked up without a restart.
+    """
+
+    def __init__(self, root, rescan_interval=30.0):
+        self.root = root
+        self.rescan_interval = rescan_interval
+        self._paths = {}  # (city, meeting type, template type) -> path
+        self._scanned_at = None
+        self._lock = threading.Lock()
+
+    def scan(self):
+        """Walk the tenant tree and record every template file in it"""
+        paths = {}
+        if os.path.isdir(self.root):
+            for city in sorted(os.listdir(self.root)):
+                city_dir = os.path.join(self.root, city)
+                if not os.path.isdir(city_dir):
+                    continue
+                for meeting_type in sorted(os.listdir(city_dir)):
+                    meeting_dir = os.path.join(city_dir, meeting_type)
+                    if not os.path.isdir(meeting_dir):
+                        continue
+                    for filename in sorted(os.listdir(meeting_dir)):
+                        template_type, extension = os.path.splitext(filename)
+                        if extension.lower() in TENANT_TEMPLATE_EXTENSIONS:
+                            key = (slugify(city), slugify(meeting_type), template_type)
+                            paths[key] = os.path.join(meeting_dir, filename)
+
+        with self._lock:
+            self._paths = paths
+            self._scanned_at = time.monotonic()
+        return paths
+
+    def find(self, city, meeting_type, template_type, extension):
+        """Return a city's own template file for this template type, or None to use the built-in one"""
+        with self._lock:
+            stale = self._scanned_at is None or time.monotonic() - self._scanned_at >= self.rescan_interval
+        if stale:
+            self.scan()
+
+        with self._lock:
+            paths = self._paths
+        city = slugify(city)
+        for meeting_dir in (slugify(meeting_type or DEFAULT_MEETING_TYPE), DEFAULT_MEETING_TYPE):
+            path = paths.get((city, meeting_dir, template_type))
+            if path is not None and path.lower().endswith(extension):
+                return path
+        return None
+
+    def stats(self):
+        with self._lock:
+            return {
+                'root': self.root,
+                'cities': len({city for city, _, _ in self._paths}),
+                'templates': len(self._paths),
+            }
+
+
+template_registry = TemplateRegistry(
+    max_bytes=int(os.environ.get('TEMPLATE_CACHE_MAX_BYTES', 64 * 1024 * 1024)),
+)
+template_catalog = TemplateCatalog(
+    os.environ.get('TEMPLATE_ROOT', 'tenants'),
+    rescan_interval=float(os.environ.get('TEMPLATE_RESCAN_INTERVAL', 30)),
+)